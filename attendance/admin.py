@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from .models import UserProfile, Student, Course, AttendanceSession, Attendance
 
 @admin.register(UserProfile)
@@ -48,13 +49,18 @@ class CourseAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(student_count=Count('students'))
+    
     def student_count(self, obj):
-        return obj.students.count()
+        return obj.student_count
     student_count.short_description = 'Enrolled Students'
+    student_count.admin_order_field = 'student_count'
 
 @admin.register(AttendanceSession)
 class AttendanceSessionAdmin(admin.ModelAdmin):
     list_display = ['course', 'date', 'start_time', 'end_time', 'duration', 'attendance_rate']
+    list_select_related = ['course', 'summary']
     list_filter = ['date', 'course', 'course__instructor']
     search_fields = ['course__code', 'course__name', 'notes']
     readonly_fields = ['created_at', 'attendance_rate']
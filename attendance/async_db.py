@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+_executor = None
+_executor_lock = threading.Lock()
+# execute_wrappers that follow run_queries() onto its threads (see observe_queries())
+_observers = contextvars.ContextVar('attendance_query_observers', default=())
+
+
+def query_executor():
+    """Threads that run concurrent reads; each keeps its own database connection."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.ASYNC_QUERY_WORKERS, thread_name_prefix='attendance-db')
+        return _executor
+
+
+def _install(stack, wrappers):
+    # Every alias: routed reads (attendance.db_router) use the replica's connection
+    for alias in connections:
+        for wrapper in wrappers:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+
+
+@contextmanager
+def observe_queries(wrapper):
+    """Install an execute_wrapper on this thread's connections and on the threads run_queries() uses.
+
+    A plain connection.execute_wrapper() only sees the default database on
+    the current thread, so profilers and query counters would miss routed
+    reads and the queries run_queries() sends to its pooled threads.
+    """
+    token = _observers.set(_observers.get() + (wrapper,))
+    try:
+        with ExitStack() as stack:
+            _install(stack, [wrapper])
+            yield
+    finally:
+        _observers.reset(token)
+
+
+def _run(query):
+    # Pooled threads outlive requests, so respect CONN_MAX_AGE like a request
+    # would; with DB_POOL (CONN_MAX_AGE=0) this hands the connection back
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            _install(stack, _observers.get())
+            return query()
+    finally:
+        close_old_connections()
+
+
+def _run_in_transaction(queries):
+    """Results of ``queries`` when the caller's connection is in a transaction, else None."""
+    if not connection.in_atomic_block:
+        return None
+    return [query() for query in queries]
+
+
+async def run_queries(*queries):
+    """Evaluate zero-argument ORM callables at the same time; returns their results in order.
+
+    Django's own async methods (aget(), acount(), async for) all hop onto
+    the request's one thread-sensitive thread, so gathering them still runs
+    the queries one after another. Here each query runs on a pooled thread
+    with its own connection and the wait is that of the slowest query.
+    Callables must return evaluated results (e.g. a list, not a queryset).
+    Each runs in a copy of the caller's context, so database routing
+    (attendance.db_router) and observe_queries() wrappers apply to it.
+
+    Other connections cannot see the rows of an open transaction (tests,
+    ATOMIC_REQUESTS), so inside one the queries run on the caller's
+    connection instead.
+    """
+    results = await sync_to_async(_run_in_transaction)(queries)
+    if results is not None:
+        return results
+    loop = asyncio.get_running_loop()
+    executor = query_executor()
+    return list(await asyncio.gather(*(
+        loop.run_in_executor(executor, contextvars.copy_context().run, _run, query) for query in queries
+    )))
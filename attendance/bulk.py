@@ -0,0 +1,100 @@
+from django.db import transaction
+
+from .models import Attendance
+from .rollups import apply_changes
+
+VALID_STATUSES = {choice for choice, _ in Attendance.STATUS_CHOICES}
+
+
+def get_session_attendance_map(session):
+    """Return {student_id: Attendance} for every record in a session (one query)."""
+    return {att.student_id: att for att in Attendance.objects.filter(session=session)}
+
+
+def get_session_roster(session):
+    """Return enrolled students annotated with their current status and remarks.
+
+    Two queries in total regardless of class size: one for the roster and one
+    for the existing attendance rows of the session.
+    """
+    students = list(session.course.students.all())
+    existing = get_session_attendance_map(session)
+    for student in students:
+        attendance = existing.get(student.id)
+        student.attendance_status = attendance.status if attendance else 'absent'
+        student.attendance_remarks = attendance.remarks if attendance else ''
+    return students
+
+
+def apply_session_attendance(session, entries, enrolled_ids=None):
+    """Write attendance for many students of a session in a single statement.
+
+    Parameters:
+    - session: AttendanceSession being marked
+    - entries: iterable of (student_id, status, remarks) tuples
+    - enrolled_ids: optional set of enrolled student ids, fetched if omitted
+
+    Entries for students not enrolled in the course or with an unknown status
+    are skipped. Existing rows are updated in place through the
+    (session, student) unique key and the rollup tables are adjusted in the
+    same transaction.
+
+    Returns: (saved_count, skipped_count)
+    """
+    if enrolled_ids is None:
+        enrolled_ids = set(session.course.students.values_list('id', flat=True))
+
+    records = {}
+    skipped = 0
+    for student_id, status, remarks in entries:
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        if student_id not in enrolled_ids or status not in VALID_STATUSES:
+            skipped += 1
+            continue
+        # Last entry wins if the same student appears twice in one batch
+        records[student_id] = Attendance(
+            session=session,
+            student_id=student_id,
+            status=status,
+            remarks=remarks or '',
+        )
+
+    if records:
+        with transaction.atomic():
+            previous = dict(
+                Attendance.objects.select_for_update()
+                .filter(session=session, student_id__in=list(records))
+                .order_by()
+                .values_list('student_id', 'status')
+            )
+            Attendance.objects.bulk_create(
+                records.values(),
+                update_conflicts=True,
+                unique_fields=['session', 'student'],
+                update_fields=['status', 'remarks'],
+            )
+            apply_changes(
+                (session.id, student_id, session.course_id, session.date, previous.get(student_id), record.status)
+                for student_id, record in records.items()
+            )
+
+    return len(records), skipped
+
+
+def entries_from_post(post, student_ids, default_status=None):
+    """Build (student_id, status, remarks) entries from a marking form POST.
+
+    Students without a status field are given ``default_status``, or left
+    out entirely when it is None.
+    """
+    entries = []
+    for student_id in student_ids:
+        status = post.get(f'status_{student_id}', default_status)
+        if not status:
+            continue
+        entries.append((student_id, status, post.get(f'remarks_{student_id}', '')))
+    return entries
@@ -0,0 +1,153 @@
+import hmac
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import live, page_cache
+from .models import Attendance, PendingCheckin
+from .rollups import apply_pending_checkins, record_change
+from .rotating_codes import verify_code
+from .session_cache import get_session_context
+
+CHECKIN_RECORDED = 'recorded'
+CHECKIN_DUPLICATE = 'duplicate'
+CHECKIN_NOT_FOUND = 'not_found'
+CHECKIN_NOT_ENROLLED = 'not_enrolled'
+CHECKIN_CLOSED = 'closed'
+CHECKIN_INVALID_CODE = 'invalid_code'
+
+CHECKIN_MESSAGES = {
+    CHECKIN_RECORDED: 'Checked in — attendance recorded.',
+    CHECKIN_DUPLICATE: 'You have already checked in to this session.',
+    CHECKIN_NOT_FOUND: 'Session not found.',
+    CHECKIN_NOT_ENROLLED: 'You are not enrolled in this course.',
+    CHECKIN_CLOSED: 'Check-in is not open at this time.',
+    CHECKIN_INVALID_CODE: 'Invalid or missing check-in code.',
+}
+
+# HTTP status used by the JSON API for each outcome
+CHECKIN_HTTP_STATUS = {
+    CHECKIN_RECORDED: 201,
+    CHECKIN_DUPLICATE: 200,
+    CHECKIN_NOT_FOUND: 404,
+    CHECKIN_NOT_ENROLLED: 403,
+    CHECKIN_CLOSED: 409,
+    CHECKIN_INVALID_CODE: 400,
+}
+
+
+def _insert_checkin(session_id, student_id, status, now, checkin_time):
+    """Insert a check-in row unless the student has one, queueing its rollup update.
+
+    One INSERT ... ON CONFLICT DO NOTHING on PostgreSQL, where a
+    data-modifying CTE also queues the PendingCheckin row; two INSERTs in a
+    transaction elsewhere.
+
+    Returns whether a row was inserted.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Attendance._meta.db_table)
+    queue = qn(PendingCheckin._meta.db_table)
+    insert = (
+        f'INSERT INTO {table} (session_id, student_id, status, remarks, recorded_at, checkin_time) '
+        f'VALUES (%s, %s, %s, %s, %s, %s) '
+        f'ON CONFLICT (session_id, student_id) DO NOTHING'
+    )
+    params = [
+        session_id,
+        student_id,
+        status,
+        '',
+        connection.ops.adapt_datetimefield_value(now),
+        connection.ops.adapt_timefield_value(checkin_time),
+    ]
+    enqueue = f'INSERT INTO {queue} (session_id, student_id, status)'
+    if connection.vendor == 'postgresql':
+        sql = (
+            f'WITH inserted AS ({insert} RETURNING session_id, student_id, status) '
+            f'{enqueue} SELECT session_id, student_id, status FROM inserted RETURNING id'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone() is not None
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'{insert} RETURNING status', params)
+            if cursor.fetchone() is None:
+                return False
+            cursor.execute(f'{enqueue} VALUES (%s, %s, %s)', [session_id, student_id, status])
+    return True
+
+
+def _upsert_checkin(context, student_id, status, now):
+    """Insert or fill in a check-in row.
+
+    The common case (first check-in, no existing row) is a single insert
+    whose rollup and risk updates are queued (see _insert_checkin()) and
+    applied in batches by rollups.apply_pending_checkins(). Rows that
+    already carry a check-in time are left untouched, which makes retries
+    idempotent. A row pre-created by the instructor (e.g. marked absent) is
+    upgraded, and its rollups adjusted at once.
+
+    Returns the stored status, or None when the student had already checked in.
+    """
+    session_id = context['session_id']
+    checkin_time = timezone.localtime(now).time().replace(microsecond=0)
+    if _insert_checkin(session_id, student_id, status, now, checkin_time):
+        # The roster changed now; the counts follow when the queue is applied.
+        # The raw insert sends no post_save, so pages listing rows are expired here.
+        page_cache.bump('attendance')
+        transaction.on_commit(lambda: live.notify([session_id]))
+        if settings.JOB_QUEUE_INLINE:
+            transaction.on_commit(apply_pending_checkins)
+        return status
+
+    with transaction.atomic():
+        existing = Attendance.objects.select_for_update().filter(
+            session_id=session_id, student_id=student_id, checkin_time__isnull=True,
+        ).order_by().values_list('id', 'status').first()
+        if existing is None:
+            return None
+        Attendance.objects.filter(id=existing[0]).update(status=status, checkin_time=checkin_time)
+        record_change(session_id, student_id, existing[1], status, context=context)
+    return status
+
+
+def record_checkin(session_id, user_id, code=None, now=None):
+    """Check a student in to a session.
+
+    Uses the cached session context for enrolment, window and code checks
+    (rotating codes are verified by computation), so a warm request only
+    issues the check-in insert. The status is 'late' once the session's
+    late_cutoff_minutes have passed.
+
+    Returns: (outcome, status) where outcome is one of the CHECKIN_* constants
+    and status is the recorded attendance status (or None).
+    """
+    context = get_session_context(session_id)
+    if context is None:
+        return CHECKIN_NOT_FOUND, None
+
+    student_id = context['user_students'].get(user_id)
+    if student_id is None:
+        return CHECKIN_NOT_ENROLLED, None
+
+    now = now or timezone.now()
+    if not (context['start_dt'] <= now <= context['end_dt']):
+        return CHECKIN_CLOSED, None
+
+    required_code = context['checkin_code']
+    if context['rotating_code']:
+        if not verify_code(session_id, code, now):
+            return CHECKIN_INVALID_CODE, None
+    elif required_code:
+        entered = (code or '').strip()
+        if not entered or not hmac.compare_digest(entered.encode(), required_code.encode()):
+            return CHECKIN_INVALID_CODE, None
+
+    status = 'late' if now > context['late_dt'] else 'present'
+    stored = _upsert_checkin(context, student_id, status, now)
+    if stored is None:
+        return CHECKIN_DUPLICATE, None
+    return CHECKIN_RECORDED, stored
@@ -0,0 +1,114 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+# Cookie set after a write: until it expires the writer's reads stay on the
+# primary, so they see their own writes while the replica catches up
+STICKY_COOKIE = 'db_primary_until'
+
+# Alias reads go to in the current request/task; None means the primary
+_read_alias = ContextVar('attendance_read_alias', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def reading_replica():
+    """Whether reads in the current context go to the replica."""
+    return _read_alias.get() is not None
+
+
+class ReplicaRouter:
+    """Send reads to the replica inside replica_reads()/use_replica, everything else to the primary.
+
+    Outside those blocks, and inside a transaction on the primary, nothing
+    changes: writes, check-ins and ordinary pages stay on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Reads after a write in the same request must see it
+        if _read_alias.get() is not None:
+            _read_alias.set(None)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica_reads():
+    """Route the reads of the enclosed block to the replica, if one is configured."""
+    token = _read_alias.set(REPLICA_ALIAS if replica_configured() else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def sticky_to_primary(request):
+    """Whether ``request`` comes from a user who wrote within REPLICA_STICKY_SECONDS."""
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _stream_from_replica(content):
+    # Streamed rows are read after the view has returned
+    with replica_reads():
+        yield from content
+
+
+def use_replica(view):
+    """Serve a read-only view (report, analytics, export) from the replica.
+
+    Requests from users inside their sticky-primary window read from the
+    primary instead.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if sticky_to_primary(request):
+            return view(request, *args, **kwargs)
+        with replica_reads():
+            response = view(request, *args, **kwargs)
+            replica = reading_replica()
+        if replica and response.streaming and not response.is_async:
+            response.streaming_content = _stream_from_replica(response.streaming_content)
+        return response
+    return wrapper
+
+
+class PrimaryStickinessMiddleware:
+    """Mark users who just sent a write (any unsafe method) as sticky to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_configured():
+            seconds = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, f'{time.time() + seconds:.0f}', max_age=seconds,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
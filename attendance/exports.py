@@ -0,0 +1,168 @@
+import csv
+
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Attendance, AttendanceSession
+from .statistics import STATUSES, attendance_rate, status_aggregates
+from .utils import generate_attendance_report
+
+# Rows fetched per round trip; on PostgreSQL .iterator() uses a server-side
+# cursor so only one chunk is held in memory at a time.
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    """Return a StreamingHttpResponse that writes ``rows`` as CSV lazily."""
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in rows),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _report_filename():
+    return f'attendance_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
+
+
+def _time_range(start_time, end_time):
+    return f"{start_time.strftime('%H:%M')} - {end_time.strftime('%H:%M')}"
+
+
+def _counter_row(counts):
+    return [counts['total']] + [counts[status] for status in STATUSES] + [f'{attendance_rate(counts)}%']
+
+
+def session_rows(session):
+    """Rows of the per-session export (same columns as export_attendance_csv)."""
+    yield ['Student ID', 'Name', 'Email', 'Status', 'Remarks', 'Recorded At']
+    rows = Attendance.objects.filter(session=session).values_list(
+        'student__student_id', 'student__first_name', 'student__last_name', 'student__email',
+        'status', 'remarks', 'recorded_at',
+    )
+    for student_id, first_name, last_name, email, status, remarks, recorded_at in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            student_id,
+            f"{first_name} {last_name}",
+            email,
+            status.capitalize(),
+            remarks,
+            recorded_at.strftime('%Y-%m-%d %H:%M:%S') if recorded_at else '',
+        ]
+
+
+def general_report_rows(filters=None):
+    """Rows of the detailed report export, filtered like generate_attendance_report."""
+    yield ['Student ID', 'Name', 'Email', 'Course', 'Date', 'Time', 'Status', 'Remarks']
+    for record in generate_attendance_report(filters):
+        yield [
+            record['student_id'],
+            record['student_name'],
+            record['email'],
+            f"{record['course_code']} - {record['course_name']}",
+            record['session_date'],
+            record['session_time'],
+            record['status'],
+            record['remarks'],
+        ]
+
+
+def course_report_rows(course, date_from=None, date_to=None):
+    """Rows of the course report export.
+
+    Per-session counts come from the session rollup rows and the student
+    summary from one grouped query, so neither depends on holding the
+    course's attendance in memory.
+    """
+    yield ['Attendance Report for:', course.code, '-', course.name]
+    if date_from:
+        yield ['Date Range:', date_from, 'to', date_to]
+    yield []
+    yield ['Date', 'Time', 'Total', 'Present', 'Absent', 'Late', 'Excused', 'Attendance Rate']
+
+    sessions = AttendanceSession.objects.filter(course=course)
+    attendance = Attendance.objects.filter(session__course=course)
+    if date_from:
+        sessions = sessions.filter(date__gte=date_from)
+        attendance = attendance.filter(session__date__gte=date_from)
+    if date_to:
+        sessions = sessions.filter(date__lte=date_to)
+        attendance = attendance.filter(session__date__lte=date_to)
+
+    counters = ['total'] + STATUSES
+    session_values = sessions.order_by('date').values_list(
+        'date', 'start_time', 'end_time', *[f'summary__{field}' for field in counters]
+    )
+    for date, start_time, end_time, *values in session_values.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        counts = {field: value or 0 for field, value in zip(counters, values)}
+        yield [date, _time_range(start_time, end_time)] + _counter_row(counts)
+
+    yield []
+    yield ['Student Summary', '', '', '', '', '']
+    yield ['Name', 'Student ID', 'Total', 'Present', 'Absent', 'Late', 'Excused', 'Attendance Rate']
+
+    students = attendance.order_by('student__last_name').values(
+        'student_id', 'student__first_name', 'student__last_name', 'student__student_id',
+    ).annotate(**status_aggregates())
+    for row in students.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            f"{row['student__first_name']} {row['student__last_name']}",
+            row['student__student_id'],
+        ] + _counter_row(row)
+
+
+def student_report_rows(student):
+    """Rows of the student report export (per-course counts and totals)."""
+    yield ['Attendance Report for:', f"{student.first_name} {student.last_name}"]
+    yield ['Student ID:', student.student_id]
+    yield ['Email:', student.email]
+    yield []
+    yield ['Course', 'Total Sessions', 'Present', 'Absent', 'Late', 'Excused', 'Attendance Rate']
+
+    totals = dict.fromkeys(['total'] + STATUSES, 0)
+    courses = Attendance.objects.filter(student=student).values(
+        'session__course_id', 'session__course__code',
+    ).annotate(latest=Max('session__date'), **status_aggregates()).order_by('-latest')
+    for row in courses.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        for field in totals:
+            totals[field] += row[field]
+        yield [row['session__course__code']] + _counter_row(row)
+
+    yield []
+    yield ['Summary', '', '', '', '', '']
+    yield ['Total Sessions', totals['total']]
+    for status in STATUSES:
+        yield [f'Total {status.capitalize()}', totals[status]]
+
+
+def stream_session_csv(session):
+    filename = f'attendance_{session.id}_{timezone.now().strftime("%Y%m%d")}.csv'
+    return stream_csv(session_rows(session), filename)
+
+
+def stream_report_csv(report_type, **params):
+    """Streaming counterpart of export_report_to_csv.
+
+    Parameters:
+    - report_type: 'general', 'student', or 'course'
+    - params: filters= for 'general', course=/date_from=/date_to= for
+      'course', student= for 'student'
+
+    Returns: StreamingHttpResponse with CSV data
+    """
+    builders = {
+        'general': general_report_rows,
+        'course': course_report_rows,
+        'student': student_report_rows,
+    }
+    return stream_csv(builders[report_type](**params), _report_filename())
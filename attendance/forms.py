@@ -3,6 +3,7 @@ from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.utils import timezone
 from .models import UserProfile, Student, Course, AttendanceSession, RecurringSession
+from .recurrence import parse_dates
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -157,7 +158,7 @@ class CourseForm(forms.ModelForm):
 class AttendanceSessionForm(forms.ModelForm):
     class Meta:
         model = AttendanceSession
-        fields = ['course', 'date', 'start_time', 'end_time', 'notes', 'duration', 'late_cutoff_minutes']
+        fields = ['course', 'date', 'start_time', 'end_time', 'notes', 'duration', 'late_cutoff_minutes', 'rotating_code']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'start_time': forms.TimeInput(attrs={'type': 'time', 'class': 'form-control'}),
@@ -165,6 +166,7 @@ class AttendanceSessionForm(forms.ModelForm):
             'duration': forms.NumberInput(attrs={'class': 'form-control', 'min': '15', 'max': '240'}),
             'late_cutoff_minutes': forms.NumberInput(attrs={'class': 'form-control', 'min': '5', 'max': '60'}),
             'course': forms.Select(attrs={'class': 'form-select'}),
+            'rotating_code': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
         help_texts = {
             'course': 'Select the course for this attendance session.',
@@ -174,6 +176,7 @@ class AttendanceSessionForm(forms.ModelForm):
             'notes': 'Optional notes about the session (e.g., Topics covered, special announcements).',
             'duration': 'Session duration in minutes (15-240). Auto-calculated from start/end times.',
             'late_cutoff_minutes': 'Minutes after start time to automatically mark late arrivals.',
+            'rotating_code': 'Show a QR code on the projector with a check-in code that keeps changing, so codes cannot be passed on.',
         }
     
     def __init__(self, *args, **kwargs):
@@ -185,9 +188,15 @@ class AttendanceSessionForm(forms.ModelForm):
 
 
 class RecurringSessionForm(forms.ModelForm):
+    exclude_dates = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2, 'placeholder': '2026-11-26, 2026-12-24'}),
+        help_text='Dates without a session, e.g. holidays (YYYY-MM-DD, separated by commas or new lines).',
+    )
+
     class Meta:
         model = RecurringSession
-        fields = ['course', 'start_date', 'end_date', 'start_time', 'end_time', 'frequency', 'day_of_week', 'notes']
+        fields = ['course', 'start_date', 'end_date', 'start_time', 'end_time', 'frequency', 'day_of_week', 'notes', 'lazy']
         widgets = {
             'start_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'end_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
@@ -204,6 +213,7 @@ class RecurringSessionForm(forms.ModelForm):
                 (6, 'Sunday'),
             ]),
             'course': forms.Select(attrs={'class': 'form-select'}),
+            'lazy': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
         help_texts = {
             'course': 'Select the course for this recurring session.',
@@ -214,13 +224,20 @@ class RecurringSessionForm(forms.ModelForm):
             'frequency': 'How often the session repeats.',
             'day_of_week': 'For weekly/biweekly: which day of the week.',
             'notes': 'Optional notes about these sessions.',
+            'lazy': 'Create each session when it is first used (check-in, marking or opening it) instead of the whole term now.',
         }
 
+    def clean_exclude_dates(self):
+        try:
+            return parse_dates(self.cleaned_data['exclude_dates'])
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+
 
 class StudentImportForm(forms.Form):
     csv_file = forms.FileField(
         label='CSV File',
-        help_text='Upload CSV with columns: student_id, first_name, last_name, email, (optional) phone, department, major'
+        help_text='Upload CSV with columns: student_id, first_name, last_name, email, (optional) phone, department, major, date_of_birth'
     )
     course = forms.ModelChoiceField(
         queryset=Course.objects.all(),
@@ -0,0 +1,169 @@
+import codecs
+import csv
+import io
+from contextlib import nullcontext
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from . import page_cache
+from .models import Course, Student
+from .risk import rebuild_risk
+from .session_cache import invalidate_course_session_contexts
+
+IMPORT_CHUNK_SIZE = 1000
+
+REQUIRED_COLUMNS = ('student_id', 'first_name', 'last_name', 'email')
+OPTIONAL_COLUMNS = ('phone', 'department', 'major')
+
+
+def iter_csv_rows(upload):
+    """Yield (row_number, row dict) from a CSV upload without reading it all.
+
+    ``upload`` may be an uploaded file (read line by line) or raw bytes.
+    """
+    if isinstance(upload, (bytes, bytearray)):
+        upload = io.BytesIO(upload)
+    reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig'))
+    return enumerate(reader, 1)
+
+
+def _clean_row(row):
+    """Return (values, error) for one CSV row."""
+    values = {column: (row.get(column) or '').strip() for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+    if not all(values[column] for column in REQUIRED_COLUMNS):
+        return None, 'Missing required fields'
+
+    for column, value in values.items():
+        max_length = Student._meta.get_field(column).max_length
+        if max_length and len(value) > max_length:
+            return None, f'{column} is longer than {max_length} characters'
+
+    date_of_birth = (row.get('date_of_birth') or '').strip()
+    values['date_of_birth'] = None
+    if date_of_birth:
+        try:
+            values['date_of_birth'] = parse_date(date_of_birth)
+        except ValueError:
+            pass
+        if values['date_of_birth'] is None:
+            return None, f'Invalid date_of_birth "{date_of_birth}" (expected YYYY-MM-DD)'
+    return values, None
+
+
+def _insert_students(rows):
+    """Create students from cleaned value dicts, skipping any that already exist.
+
+    Conflicts are ignored rather than raised, so a concurrent import that
+    creates the same student_id (or email) first does not fail the chunk;
+    the caller reads the ids back to see which rows landed.
+    """
+    Student.objects.bulk_create([Student(**values) for values in rows], ignore_conflicts=True)
+
+
+def _insert_enrollments(course_id, student_ids):
+    """Enrol students in a course, skipping those already enrolled."""
+    Enrollment = Course.students.through
+    Enrollment.objects.bulk_create(
+        [Enrollment(course_id=course_id, student_id=student_id) for student_id in student_ids],
+        ignore_conflicts=True,
+    )
+
+
+def _import_chunk(chunk, course, errors):
+    """Create missing students and enrol every valid row of a chunk.
+
+    Runs a fixed number of statements per chunk: existing students by
+    student_id, emails already in use, the student insert, the new ids and
+    the enrollment insert.
+
+    Returns: number of rows imported
+    """
+    chunk_errors = []
+    valid = []
+    for idx, row in chunk:
+        values, error = _clean_row(row)
+        if error:
+            chunk_errors.append((idx, error))
+        else:
+            valid.append((idx, values))
+    if not valid:
+        errors.extend(f'Row {idx}: {error}' for idx, error in chunk_errors)
+        return 0
+
+    student_ids = {values['student_id'] for _, values in valid}
+    existing = dict(
+        Student.objects.filter(student_id__in=student_ids).order_by().values_list('student_id', 'id')
+    )
+    emails = {values['email'] for _, values in valid if values['student_id'] not in existing}
+    taken_emails = set(Student.objects.filter(email__in=emails).order_by().values_list('email', flat=True))
+
+    new_students = {}
+    imported = []
+    for idx, values in valid:
+        student_id = values['student_id']
+        if student_id in existing or student_id in new_students:
+            imported.append(student_id)
+            continue
+        if values['email'] in taken_emails:
+            chunk_errors.append((idx, f'Email {values["email"]} is already used by another student'))
+            continue
+        if values['date_of_birth'] is None:
+            chunk_errors.append((idx, 'date_of_birth is required for new students'))
+            continue
+        taken_emails.add(values['email'])
+        new_students[student_id] = values
+        imported.append(student_id)
+
+    if new_students:
+        _insert_students(new_students.values())
+        existing.update(
+            Student.objects.filter(student_id__in=list(new_students)).order_by().values_list('student_id', 'id')
+        )
+        # Lost to a concurrent import of another student with the same email
+        for idx, values in valid:
+            if values['student_id'] in new_students and values['student_id'] not in existing:
+                chunk_errors.append((idx, f'Email {values["email"]} is already used by another student'))
+        imported = [student_id for student_id in imported if student_id in existing]
+
+    _insert_enrollments(course.id, {existing[student_id] for student_id in imported})
+    errors.extend(f'Row {idx}: {error}' for idx, error in sorted(chunk_errors))
+    return len(imported)
+
+
+def import_students(upload, course, chunk_size=IMPORT_CHUNK_SIZE, progress=None, atomic=True):
+    """Import students from a CSV upload into a course in one transaction.
+
+    The file is parsed as a stream and processed ``chunk_size`` rows at a
+    time. Students that already exist (by student_id) are enrolled as they
+    are; new students are created in bulk. Rows with missing or invalid
+    fields are reported and skipped without affecting the rest.
+
+    ``progress`` is called with the number of rows read after each chunk.
+    With ``atomic=False`` every chunk commits on its own, so progress is
+    visible to other connections; re-running a partly applied import is
+    safe because students are matched by student_id and existing
+    enrollments are skipped.
+
+    Returns: (successful_count, error_list)
+    """
+    rows = iter_csv_rows(upload)
+    successful = 0
+    errors = []
+    with transaction.atomic() if atomic else nullcontext():
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                successful += _import_chunk(chunk, course, errors)
+            if progress is not None:
+                progress(chunk[-1][0])
+    if successful:
+        # bulk_create sends no post_save or m2m_changed, so do their work here
+        invalidate_course_session_contexts([course.id])
+        page_cache.bump('course', 'student')
+        # Risk covers every enrolled student, recorded or not
+        rebuild_risk(course_ids=[course.id])
+    return successful, errors
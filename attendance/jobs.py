@@ -0,0 +1,208 @@
+import csv
+import logging
+import os
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob, Course, Student, StudentImportLog
+
+logger = logging.getLogger(__name__)
+
+# A 'processing' job whose worker has not reported progress for this long is
+# assumed to belong to a dead worker and is handed out again (up to
+# MAX_JOB_ATTEMPTS times). Handlers call update_progress() well within it.
+JOB_STALE_AFTER = timedelta(minutes=30)
+MAX_JOB_ATTEMPTS = 3
+
+# Export progress is written every this many rows
+PROGRESS_EVERY = 5000
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register the function that runs jobs of ``kind``."""
+    def register(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue_job(kind, created_by=None, params=None, input_file=None, import_log=None):
+    """Create a pending job and return it.
+
+    With settings.JOB_QUEUE_INLINE the job runs before returning, which is
+    convenient for development without a worker.
+    """
+    job = BackgroundJob(kind=kind, created_by=created_by, params=params or {}, import_log=import_log)
+    if input_file is not None:
+        job.input_file.save(os.path.basename(input_file.name), input_file, save=False)
+    job.save()
+    if getattr(settings, 'JOB_QUEUE_INLINE', False):
+        job = claim_job(f'inline-{os.getpid()}', job_id=job.id) or job
+        run_job(job)
+    return job
+
+
+def claim_job(worker, job_id=None):
+    """Atomically take the oldest pending job (or ``job_id``) for ``worker``.
+
+    Claiming is a conditional UPDATE on the status, so concurrent workers
+    never run the same job and no row locks are held while it runs.
+    """
+    candidates = BackgroundJob.objects.filter(status='pending')
+    if job_id is not None:
+        candidates = candidates.filter(id=job_id)
+    for candidate_id in candidates.order_by('created_at').values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(id=candidate_id, status='pending').update(
+            status='processing',
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=candidate_id)
+    return None
+
+
+def requeue_stale_jobs():
+    """Return jobs abandoned by a dead worker to the queue (or fail them).
+
+    A job is stale once its heartbeat is older than JOB_STALE_AFTER, however
+    long ago it started, so a long export that keeps reporting progress is
+    left alone.
+
+    Returns: number of jobs requeued
+    """
+    cutoff = timezone.now() - JOB_STALE_AFTER
+    stale = BackgroundJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status='processing',
+    )
+    stale.filter(attempts__gte=MAX_JOB_ATTEMPTS).update(
+        status='failed', error='Worker stopped responding', completed_at=timezone.now(),
+    )
+    return stale.filter(attempts__lt=MAX_JOB_ATTEMPTS).update(status='pending', worker='')
+
+
+def update_progress(job, processed, message=''):
+    """Record progress on the job row; this is also the worker's heartbeat."""
+    job.processed_items = processed
+    job.message = message
+    job.heartbeat_at = timezone.now()
+    BackgroundJob.objects.filter(id=job.id).update(
+        processed_items=processed, message=message, heartbeat_at=job.heartbeat_at,
+    )
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome on the job row."""
+    handler = JOB_HANDLERS[job.kind]
+    try:
+        handler(job)
+    except Exception:
+        logger.exception('Background job %s failed', job.id)
+        job.status = 'failed'
+        job.error = traceback.format_exc()
+        if job.import_log_id:
+            StudentImportLog.objects.filter(id=job.import_log_id).update(
+                status='failed', error_details=job.error, completed_at=timezone.now(),
+            )
+    else:
+        job.status = 'completed'
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'message', 'processed_items', 'result_file', 'completed_at'])
+    return job
+
+
+# Handlers
+
+@job_handler('student_import')
+def run_student_import(job):
+    from .imports import import_students
+
+    log = job.import_log
+    log.status = 'processing'
+    log.save(update_fields=['status'])
+
+    with job.input_file.open('rb') as upload:
+        successful, errors = import_students(
+            upload,
+            log.course,
+            progress=lambda rows: update_progress(job, rows, f'{rows} row(s) read'),
+            atomic=False,
+        )
+
+    log.status = 'completed'
+    log.total_records = successful + len(errors)
+    log.successful_imports = successful
+    log.failed_imports = len(errors)
+    log.error_details = '\n'.join(errors)
+    log.completed_at = timezone.now()
+    log.save()
+
+    job.processed_items = log.total_records
+    job.message = f'Imported {successful} student(s), {len(errors)} error(s)'
+
+
+def _report_rows(params):
+    from .exports import course_report_rows, general_report_rows, student_report_rows
+
+    report_type = params['report_type']
+    if report_type == 'course':
+        course = Course.objects.get(id=params['course_id'])
+        return course_report_rows(course, params.get('date_from'), params.get('date_to'))
+    if report_type == 'student':
+        return student_report_rows(Student.objects.get(id=params['student_id']))
+    return general_report_rows(params.get('filters'))
+
+
+def _report_data(params):
+    from .utils import (
+        generate_attendance_report, generate_course_attendance_report, generate_student_attendance_report,
+    )
+
+    report_type = params['report_type']
+    if report_type == 'course':
+        course = Course.objects.get(id=params['course_id'])
+        return generate_course_attendance_report(course, params.get('date_from'), params.get('date_to'))
+    if report_type == 'student':
+        return generate_student_attendance_report(Student.objects.get(id=params['student_id']))
+    return list(generate_attendance_report(params.get('filters')))
+
+
+@job_handler('report_export')
+def run_report_export(job):
+    from .utils import export_report_to_pdf
+
+    params = job.params
+    stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+
+    if params.get('format') == 'pdf':
+        update_progress(job, 0, 'Rendering PDF')
+        response = export_report_to_pdf(_report_data(params), params['report_type'])
+        job.result_file.save(f'attendance_report_{stamp}.pdf', ContentFile(response.content), save=False)
+        job.message = 'PDF ready'
+        return
+
+    count = 0
+    with tempfile.TemporaryFile(mode='w+', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        for row in _report_rows(params):
+            writer.writerow(row)
+            count += 1
+            if count % PROGRESS_EVERY == 0:
+                update_progress(job, count, f'{count} row(s) written')
+        handle.seek(0)
+        job.result_file.save(f'attendance_report_{stamp}.csv', File(handle), save=False)
+    job.processed_items = count
+    job.message = f'{count} row(s) written'
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Attendance, AttendanceSession, PendingCheckin, SessionAttendanceSummary
+from .statistics import STATUSES, build_statistics
+
+# Seconds between database checks of a watched session. Writes made in this
+# process wake the channel at once; the poll picks up writes made by other
+# processes (e.g. WSGI workers or the job worker).
+LIVE_POLL_INTERVAL = 5
+# Seconds of silence after which a comment line keeps proxies from closing the stream
+LIVE_KEEPALIVE = 15
+# Events buffered per connection before a slow client is resent a snapshot
+SUBSCRIBER_QUEUE_SIZE = 256
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def load_counts(session_id):
+    """Statistics of a session: its rollup row plus its check-ins still queued.
+
+    Read-only, so watching a board never competes with check-ins or the
+    worker applying the queue. One query, so the queue being applied
+    meanwhile cannot count a check-in twice or not at all.
+    """
+    summary = SessionAttendanceSummary.objects.filter(session_id=OuterRef('pk'))
+    pending = PendingCheckin.objects.filter(session_id=OuterRef('pk')).order_by().values('session_id')
+
+    def counter(field, **filters):
+        queued = pending.filter(**filters).annotate(count=Count('id')).values('count')
+        return Coalesce(Subquery(summary.values(field)), 0) + Coalesce(Subquery(queued), 0)
+
+    counters = {'count_total': counter('total')}
+    counters.update({f'count_{status}': counter(status, status=status) for status in STATUSES})
+    row = AttendanceSession.objects.filter(id=session_id).values(**counters).first() or {}
+    return build_statistics({name[len('count_'):]: value for name, value in row.items()})
+
+
+def load_roster(session_id):
+    """Attendance rows of a session keyed by student id (one query)."""
+    rows = Attendance.objects.filter(session_id=session_id).order_by().values_list(
+        'student_id', 'status', 'student__student_id', 'student__first_name', 'student__last_name',
+    )
+    return {
+        student_id: {
+            'student_id': student_id,
+            'student_number': number,
+            'name': f'{first_name} {last_name}',
+            'status': status,
+        }
+        for student_id, status, number, first_name, last_name in rows
+    }
+
+
+def session_snapshot(session_id):
+    return {'counts': load_counts(session_id), 'attendance': list(load_roster(session_id).values())}
+
+
+def _load(loader, session_id):
+    # Runs on the shared executor, so respect CONN_MAX_AGE like a request would
+    close_old_connections()
+    return loader(session_id)
+
+
+def roster_changes(before, after):
+    """Attendance events turning roster ``before`` into ``after``."""
+    changes = []
+    for student_id, row in after.items():
+        previous = before.get(student_id)
+        if previous is None or previous['status'] != row['status']:
+            changes.append(dict(row, previous=previous['status'] if previous else None))
+    for student_id, row in before.items():
+        if student_id not in after:
+            changes.append(dict(row, status=None, previous=row['status']))
+    return changes
+
+
+class Subscriber:
+    def __init__(self, channel):
+        self.channel = channel
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.stale = False
+
+    def put(self, event, data):
+        if self.stale:
+            return
+        try:
+            self.queue.put_nowait((event, data))
+        except asyncio.QueueFull:
+            self.stale = True
+
+    def resync(self):
+        """Drop queued events; returns the snapshot to send instead."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.stale = False
+        return self.channel.snapshot()
+
+
+class SessionChannel:
+    """Pub/sub for one session on one event loop.
+
+    A single task per watched session reads the rollup row every
+    LIVE_POLL_INTERVAL seconds (or when woken by notify()), reloads the
+    roster only when something changed and fans the differences out to
+    every connection, so idle connections cost no queries of their own.
+    """
+
+    def __init__(self, session_id, loop):
+        self.session_id = session_id
+        self.loop = loop
+        self.subscribers = set()
+        self.wake = asyncio.Event()
+        self.ready = asyncio.Lock()
+        self.counts = None
+        self.roster = None
+        self.task = None
+
+    def snapshot(self):
+        return {'counts': self.counts, 'attendance': list(self.roster.values())}
+
+    async def refresh(self, reload=False):
+        counts = await sync_to_async(_load, thread_sensitive=False)(load_counts, self.session_id)
+        if not reload and counts == self.counts:
+            return
+        roster = await sync_to_async(_load, thread_sensitive=False)(load_roster, self.session_id)
+        if self.roster is None:
+            # First load; subscribers start from the snapshot
+            self.counts, self.roster = counts, roster
+            return
+        changes = roster_changes(self.roster, roster)
+        counts_changed = counts != self.counts
+        self.counts, self.roster = counts, roster
+        for change in changes:
+            self.broadcast('attendance', change)
+        if changes or counts_changed:
+            self.broadcast('counts', counts)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), LIVE_POLL_INTERVAL)
+                woken = True
+            except asyncio.TimeoutError:
+                woken = False
+            self.wake.clear()
+            try:
+                await self.refresh(reload=woken)
+            except Exception:
+                # Keep serving; the next poll retries
+                await asyncio.sleep(LIVE_POLL_INTERVAL)
+
+    def broadcast(self, event, data):
+        for subscriber in self.subscribers:
+            subscriber.put(event, data)
+
+
+@asynccontextmanager
+async def subscribe(session_id):
+    """Join the channel of a session; yields a Subscriber with a loaded snapshot."""
+    loop = asyncio.get_running_loop()
+    with _channels_lock:
+        channel = _channels.get(session_id)
+        if channel is None or channel.loop is not loop:
+            channel = _channels[session_id] = SessionChannel(session_id, loop)
+        subscriber = Subscriber(channel)
+        channel.subscribers.add(subscriber)
+    try:
+        async with channel.ready:
+            if channel.task is None:
+                await channel.refresh(reload=True)
+                channel.task = loop.create_task(channel.run())
+        yield subscriber
+    finally:
+        with _channels_lock:
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers:
+                if channel.task is not None:
+                    channel.task.cancel()
+                if _channels.get(session_id) is channel:
+                    del _channels[session_id]
+
+
+def notify(session_ids):
+    """Wake the channels of changed sessions (safe to call from any thread)."""
+    for session_id in set(session_ids):
+        channel = _channels.get(session_id)
+        if channel is None:
+            continue
+        try:
+            channel.loop.call_soon_threadsafe(channel.wake.set)
+        except RuntimeError:
+            # The loop has been closed
+            pass
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, default=str)}\n\n'
+
+
+async def event_stream(session_id):
+    """Server-sent events for a session: a snapshot, then changes as they happen."""
+    async with subscribe(session_id) as subscriber:
+        yield f'retry: {LIVE_POLL_INTERVAL * 1000}\n'
+        yield format_event('snapshot', subscriber.channel.snapshot())
+        while True:
+            try:
+                event, data = await asyncio.wait_for(subscriber.queue.get(), LIVE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if subscriber.stale:
+                yield format_event('snapshot', subscriber.resync())
+                continue
+            yield format_event(event, data)
@@ -0,0 +1,134 @@
+import copy
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+
+from attendance.management.commands.benchmark_views import latency_summary
+from attendance.models import AttendanceSession, Course
+
+MODES = ('direct', 'pooled')
+BENCH_ALIAS = 'pool_benchmark'
+
+
+def simulated_request(alias):
+    """The reads of a typical page (dashboard-sized), then the end of the request."""
+    try:
+        list(Course.objects.using(alias).annotate(student_count=Count('students')).order_by('code')[:20])
+        AttendanceSession.objects.using(alias).filter(date=timezone.localdate()).count()
+        list(AttendanceSession.objects.using(alias).select_related('course').order_by('-date')[:5])
+    finally:
+        # What request_finished does with CONN_MAX_AGE=0: close a direct
+        # connection, hand a pooled one back
+        connections[alias].close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare request throughput with and without the psycopg connection pool at several '
+        'concurrency levels (threads standing in for gunicorn worker threads). PostgreSQL only'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16], help='Concurrency levels')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per worker')
+        parser.add_argument(
+            '--pool-size', type=int, default=settings.DB_POOL_OPTIONS['max_size'],
+            help='Pool max_size (default DB_POOL_MAX_SIZE)',
+        )
+        parser.add_argument('--output', default='benchmark_pool.json', help='JSON file to write')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'postgresql':
+            raise CommandError('The connection pool needs PostgreSQL; set DATABASE_URL to a PostgreSQL database.')
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            raise CommandError('psycopg_pool is not installed (pip install "psycopg[pool]").')
+        if options['requests'] < 1 or min(options['workers']) < 1:
+            raise CommandError('--workers and --requests must be positive')
+
+        results = []
+        for mode in MODES:
+            for workers in options['workers']:
+                result = self._run(mode, workers, options['requests'], options['pool_size'])
+                results.append(result)
+                self.stdout.write(
+                    f'{mode:<7}{workers:>4} workers  {result["throughput"]:8.0f} req/s  '
+                    f'p50 {result["p50_ms"]:7.1f} ms  p95 {result["p95_ms"]:7.1f} ms  '
+                    f'connections opened {result["connections_opened"]}'
+                    + (f'  waited {result["waits"]}x, {result["mean_wait_ms"]:.1f} ms' if mode == 'pooled' else '')
+                )
+
+        self._compare(results)
+        with open(options['output'], 'w') as handle:
+            json.dump({
+                'at': timezone.now().isoformat(),
+                'requests_per_worker': options['requests'],
+                'pool_size': options['pool_size'],
+                'results': results,
+            }, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'✓ Wrote {options["output"]}'))
+
+    def _configure(self, mode, pool_size):
+        database = copy.deepcopy(connections.settings['default'])
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'].pop('pool', None)
+        if mode == 'pooled':
+            database['OPTIONS']['pool'] = dict(settings.DB_POOL_OPTIONS, min_size=1, max_size=pool_size)
+        connections.settings[BENCH_ALIAS] = database
+
+    def _run(self, mode, workers, requests, pool_size):
+        self._configure(mode, pool_size)
+
+        def worker(_):
+            latencies = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                simulated_request(BENCH_ALIAS)
+                latencies.append(time.perf_counter() - started)
+            return latencies
+
+        try:
+            if mode == 'pooled':
+                # Open the pool outside the timed run, as a long-lived worker would have
+                connections[BENCH_ALIAS].pool.open(wait=True)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                latencies = [latency for chunk in executor.map(worker, range(workers)) for latency in chunk]
+            elapsed = time.perf_counter() - started
+
+            result = {'mode': mode, 'workers': workers, 'requests': len(latencies)}
+            result['throughput'] = round(len(latencies) / elapsed, 1)
+            result.update(latency_summary(latencies))
+            if mode == 'pooled':
+                stats = connections[BENCH_ALIAS].pool.get_stats()
+                queued = stats.get('requests_queued', 0)
+                result['connections_opened'] = stats.get('connections_num', 0)
+                result['waits'] = queued
+                result['mean_wait_ms'] = round(stats.get('requests_wait_ms', 0) / queued, 1) if queued else 0
+            else:
+                # Every direct request opens its own connection
+                result['connections_opened'] = len(latencies)
+            return result
+        finally:
+            if mode == 'pooled':
+                connections[BENCH_ALIAS].close_pool()
+                # Drop this thread's wrapper too; the next run configures the alias afresh
+                del connections[BENCH_ALIAS]
+            del connections.settings[BENCH_ALIAS]
+
+    def _compare(self, results):
+        direct = {result['workers']: result for result in results if result['mode'] == 'direct'}
+        self.stdout.write(self.style.MIGRATE_HEADING('Pooled vs direct throughput'))
+        for result in results:
+            if result['mode'] != 'pooled' or result['workers'] not in direct:
+                continue
+            baseline = direct[result['workers']]['throughput']
+            change = (result['throughput'] / baseline - 1) * 100 if baseline else 0
+            self.stdout.write(f'  {result["workers"]:>4} workers  {change:+.0f}%')
@@ -0,0 +1,229 @@
+import json
+import subprocess
+import threading
+import time
+from datetime import time as dtime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.async_db import observe_queries
+from attendance.models import Attendance, AttendanceSession, Course, Student, UserProfile
+
+VIEWS = ['dashboard', 'session_detail', 'course_analytics', 'detailed_attendance_report', 'student_checkin']
+PERCENTILES = (50, 90, 95, 99)
+
+
+class QueryCounter:
+    """execute_wrapper counting statements, including those run_queries() runs on its threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def latency_summary(latencies):
+    """Percentiles, mean and max (in ms) of a list of latencies in seconds."""
+    ordered = sorted(latencies)
+    summary = {
+        f'p{p}_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000, 2)
+        for p in PERCENTILES
+    }
+    summary['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 2)
+    summary['max_ms'] = round(ordered[-1] * 1000, 2)
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the key views with the test client and write latency percentiles and '
+        'query counts to JSON (run seed_bulk first for a realistic dataset)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per view first')
+        parser.add_argument('--course', help='Course code to benchmark (default: the largest course)')
+        parser.add_argument('--views', nargs='+', choices=VIEWS, default=VIEWS, help='Views to run')
+        parser.add_argument('--label', help='Name of this run (default: the current git commit)')
+        parser.add_argument('--output', default='benchmark.json', help='JSON file to write')
+        parser.add_argument('--compare', help='Earlier JSON result to print the change against')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be positive')
+        course = self._pick_course(options['course'])
+        session = (
+            AttendanceSession.objects.filter(course=course, date__lte=timezone.localdate())
+            .order_by('-date', '-start_time').first()
+        )
+        if session is None:
+            raise CommandError(f'{course.code} has no sessions yet')
+        user = self._staff_user(course)
+
+        results = {}
+        # The test client host is not in ALLOWED_HOSTS outside the test runner
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            client = Client()
+            client.force_login(user)
+            requests = {
+                'dashboard': lambda i: client.get(reverse('dashboard')),
+                'session_detail': lambda i: client.get(reverse('session_detail', args=[session.id])),
+                'course_analytics': lambda i: client.get(reverse('course_analytics', args=[course.id])),
+                'detailed_attendance_report': lambda i: client.get(
+                    reverse('detailed_attendance_report'), {'course': course.id} if i % 2 else {},
+                ),
+            }
+            for name in options['views']:
+                if name == 'student_checkin':
+                    results[name] = self._benchmark_checkin(course, options['requests'], options['warmup'])
+                else:
+                    results[name] = self._benchmark(requests[name], options['requests'], options['warmup'])
+                self._report(name, results[name])
+
+        output = {
+            'label': options['label'] or self._git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'vendor': connection.vendor,
+            'course': course.code,
+            'dataset': {
+                'students': Student.objects.count(),
+                'courses': Course.objects.count(),
+                'sessions': AttendanceSession.objects.count(),
+                'attendance': Attendance.objects.count(),
+            },
+            'views': results,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(output, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'✓ Results written to {options["output"]}'))
+
+        if options['compare']:
+            self._compare(options['compare'], output)
+
+    def _benchmark(self, request, count, warmup):
+        for index in range(warmup):
+            request(index)
+        latencies, queries, statuses = [], [], {}
+        for index in range(warmup, warmup + count):
+            counter = QueryCounter()
+            with observe_queries(counter):
+                started = time.perf_counter()
+                response = request(index)
+                latencies.append(time.perf_counter() - started)
+            queries.append(counter.queries)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        return {
+            'requests': count,
+            **latency_summary(latencies),
+            'queries_min': min(queries),
+            'queries_max': max(queries),
+            'status_codes': {str(code): n for code, n in sorted(statuses.items())},
+        }
+
+    def _benchmark_checkin(self, course, count, warmup):
+        """POST check-ins to a session opened for the run, one student per request.
+
+        Enrolled students without an account are lent a temporary user;
+        the session, users and links are removed afterwards.
+        """
+        prefix = f'bench{int(time.time())}'
+        student_ids = list(
+            course.students.filter(user__isnull=True).order_by('id').values_list('id', flat=True)[:count + warmup]
+        )
+        if len(student_ids) < count + warmup:
+            raise CommandError(f'{course.code} needs {count + warmup} enrolled students without an account')
+
+        User.objects.bulk_create([User(username=f'{prefix}_{i}') for i in range(len(student_ids))])
+        users = list(User.objects.filter(username__startswith=f'{prefix}_').order_by('id'))
+        UserProfile.objects.bulk_create([UserProfile(user=user, role='student') for user in users])
+        for user, student_id in zip(users, student_ids):
+            Student.objects.filter(id=student_id).update(user=user)
+        session = AttendanceSession.objects.create(
+            course=course,
+            date=timezone.localdate(),
+            start_time=dtime(0, 0),
+            end_time=dtime(23, 59, 59),
+            checkin_code='BENCH',
+            notes='Benchmark session',
+        )
+        url = reverse('student_checkin', args=[session.id])
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        try:
+            return self._benchmark(
+                lambda i: clients[i % len(clients)].post(url, {'checkin_code': 'BENCH'}),
+                count,
+                warmup,
+            )
+        finally:
+            session.delete()
+            Student.objects.filter(user__in=users).update(user=None)
+            User.objects.filter(username__startswith=f'{prefix}_').delete()
+
+    def _pick_course(self, code):
+        if code:
+            course = Course.objects.filter(code=code).first()
+            if course is None:
+                raise CommandError(f'Course {code} not found')
+            return course
+        course = (
+            Course.objects.annotate(student_count=Count('students'))
+            .filter(Exists(AttendanceSession.objects.filter(course=OuterRef('pk'))))
+            .order_by('-student_count').first()
+        )
+        if course is None:
+            raise CommandError('No courses with sessions. Run seed_bulk first.')
+        return course
+
+    def _staff_user(self, course):
+        if course.instructor and UserProfile.objects.filter(user=course.instructor, role='instructor').exists():
+            return course.instructor
+        profile = UserProfile.objects.filter(role='admin').select_related('user').first()
+        if profile is None:
+            raise CommandError(f'{course.code} has no instructor and there is no admin user')
+        return profile.user
+
+    def _report(self, name, result):
+        self.stdout.write(
+            f'{name:<28} p50 {result["p50_ms"]:8.1f} ms  p95 {result["p95_ms"]:8.1f} ms  '
+            f'p99 {result["p99_ms"]:8.1f} ms  queries {result["queries_min"]}-{result["queries_max"]}'
+        )
+
+    def _compare(self, path, current):
+        with open(path) as handle:
+            previous = json.load(handle)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Change from {previous.get("label")}'))
+        for name, result in current['views'].items():
+            before = previous['views'].get(name)
+            if not before:
+                continue
+            change = (result['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0
+            line = (
+                f'{name:<28} p95 {before["p95_ms"]:8.1f} -> {result["p95_ms"]:8.1f} ms ({change:+.0f}%)  '
+                f'queries {before["queries_max"]} -> {result["queries_max"]}'
+            )
+            regressed = change > 10 or result['queries_max'] > before['queries_max']
+            self.stdout.write(self.style.WARNING(line) if regressed else line)
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
@@ -0,0 +1,122 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from attendance.models import Attendance, AttendanceSession, Student, StudentImportLog
+from attendance.synthetic import plan_institution, seed_institution
+from attendance.utils import attendance_report_queryset
+
+# Indexes added for the view query shapes (migration 0007)
+INDEX_PLAN = [
+    index.name
+    for model in (Attendance, AttendanceSession, Student, StudentImportLog)
+    for index in model._meta.indexes
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the main view queries with and without the query indexes. '
+        'The "before" run drops the indexes inside a transaction that is rolled back; '
+        'do not run against a live database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-rows', type=int, default=0,
+                            help='First generate a synthetic institution with about this many attendance rows')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per query (fastest is reported)')
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['seed_rows']:
+            plan = plan_institution(options['seed_rows'])
+            self.stdout.write(f'Seeding {plan}...')
+            counts = seed_institution(**plan, log=lambda message: self.stdout.write(f'  {message}'))
+            self.stdout.write(self.style.SUCCESS(f'✓ Seeded dataset {counts["prefix"]}'))
+
+        total = Attendance.objects.count()
+        if not total:
+            raise CommandError('No attendance rows. Use --seed-rows to generate a dataset first.')
+        self.stdout.write(f'Attendance rows: {total}')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        queries = self.build_queries()
+        after = self.measure(queries, options['repeat'], phase='after')
+
+        # DROP INDEX is transactional on PostgreSQL and SQLite
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in INDEX_PLAN:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            before = self.measure(queries, options['repeat'], phase='before')
+            transaction.set_rollback(True)
+
+        results = []
+        for name in queries:
+            results.append({'query': name, 'before': before[name], 'after': after[name]})
+            speedup = before[name]['ms'] / after[name]['ms'] if after[name]['ms'] else 0
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(
+                f'  before {before[name]["ms"]:9.2f} ms   after {after[name]["ms"]:9.2f} ms   x{speedup:.1f}'
+            )
+            if options['plans']:
+                for label, result in (('before', before[name]), ('after', after[name])):
+                    self.stdout.write(f'  -- {label}')
+                    for line in result['plan'].splitlines():
+                        self.stdout.write(f'     {line}')
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as handle:
+                json.dump({'vendor': connection.vendor, 'attendance_rows': total, 'results': results}, handle, indent=2)
+            self.stdout.write(f'Results written to {options["json_path"]}')
+        self.stdout.write(self.style.SUCCESS('✓ Done (indexes restored)'))
+
+    def build_queries(self):
+        """Representative queries of the dashboard, session, student and report views."""
+        sample = Attendance.objects.order_by('-id').values('session_id', 'student_id', 'session__date').first()
+        log_course = StudentImportLog.objects.values_list('course_id', flat=True).first() or 0
+        student_id, session_id, day = sample['student_id'], sample['session_id'], sample['session__date']
+
+        return {
+            'student_absences': Attendance.objects.filter(student_id=student_id, status='absent').values('id'),
+            'student_status_counts': Attendance.objects.filter(student_id=student_id).order_by()
+                .values('status').annotate(n=Count('id')),
+            'session_roster': Attendance.objects.filter(session_id=session_id).order_by()
+                .values_list('student_id', 'status'),
+            'session_status_counts': Attendance.objects.filter(session_id=session_id).order_by()
+                .values('status').annotate(n=Count('id')),
+            'todays_sessions': AttendanceSession.objects.filter(date=day),
+            'week_sessions': AttendanceSession.objects.filter(date__gte=day - timedelta(days=7), date__lte=day),
+            'report_page': attendance_report_queryset({'date_from': day - timedelta(days=7), 'date_to': day})[:51],
+            'student_list_page': Student.objects.all()[:50],
+            'import_logs_page': StudentImportLog.objects.filter(course_id=log_course)[:20],
+        }
+
+    def explain(self, queryset, phase):
+        if connection.vendor != 'sqlite':
+            return queryset.explain()
+        # sqlite3 caches prepared statements and a cached EXPLAIN does not
+        # notice dropped indexes, so each phase gets its own statement text
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql} -- {phase}', params)
+            return '\n'.join(' '.join(str(value) for value in row) for row in cursor.fetchall())
+
+    def measure(self, queries, repeat, phase):
+        measured = {}
+        for name, queryset in queries.items():
+            plan = self.explain(queryset, phase)
+            timings = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            measured[name] = {'plan': plan, 'ms': round(min(timings), 3)}
+        return measured
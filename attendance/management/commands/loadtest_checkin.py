@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as dtime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.async_db import observe_queries
+from attendance.checkin import record_checkin, CHECKIN_RECORDED, CHECKIN_DUPLICATE
+from attendance.models import Student, Course, AttendanceSession, Attendance
+from attendance.rollups import apply_pending_checkins, verify_rollups
+
+
+class StatementCounter:
+    """execute_wrapper counting SQL statements across the load-test threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        with self.lock:
+            self.statements += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the check-in path with a burst of concurrent students, then apply the '
+        'queued rollup updates and verify them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000, help='Number of students checking in')
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent worker threads')
+        parser.add_argument('--retries', type=int, default=0, help='Duplicate check-ins per student (idempotency)')
+        parser.add_argument('--http', action='store_true', help='Go through the API view with the test client')
+        parser.add_argument('--target', type=float, default=1000.0, help='Required check-ins per second')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated fixture data')
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['threads'] < 1:
+            raise CommandError('--students and --threads must be positive')
+
+        prefix = f'LT{int(time.time())}'
+        self.stdout.write(f'Creating fixture {prefix} with {options["students"]} students...')
+        session, users = self._create_fixture(prefix, options['students'])
+
+        try:
+            attempts = [user.id for user in users] * (options['retries'] + 1)
+            check_in = self._http_check_in(session, users) if options['http'] else self._direct_check_in(session)
+            # One chunk per thread so every thread reuses its own DB connection
+            chunks = [attempts[i::options['threads']] for i in range(options['threads'])]
+
+            counter = StatementCounter()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+                results = [
+                    result
+                    for chunk_results in executor.map(
+                        lambda chunk: self._run_chunk(check_in, chunk, counter), chunks,
+                    )
+                    for result in chunk_results
+                ]
+            elapsed = time.perf_counter() - started
+
+            # What the job worker does after the burst
+            apply_started = time.perf_counter()
+            applied = apply_pending_checkins()
+            apply_elapsed = time.perf_counter() - apply_started
+            mismatches = verify_rollups([session.course_id])
+
+            outcomes = [outcome for outcome, _ in results]
+            latencies = sorted(latency for _, latency in results)
+
+            recorded = outcomes.count(CHECKIN_RECORDED)
+            duplicates = outcomes.count(CHECKIN_DUPLICATE)
+            failed = len(outcomes) - recorded - duplicates
+            rows = Attendance.objects.filter(session=session).count()
+            rate = len(outcomes) / elapsed if elapsed else 0
+
+            self.stdout.write(f'Backend:        {connection.vendor}')
+            self.stdout.write(f'Mode:           {"http" if options["http"] else "direct"}')
+            self.stdout.write(f'Requests:       {len(outcomes)} in {elapsed:.2f}s')
+            self.stdout.write(f'Recorded:       {recorded}')
+            self.stdout.write(f'Duplicates:     {duplicates}')
+            self.stdout.write(f'Failed:         {failed}')
+            self.stdout.write(f'Rows written:   {rows}')
+            self.stdout.write(f'Latency p50:    {latencies[len(latencies) // 2] * 1000:.1f} ms')
+            self.stdout.write(f'Latency p95:    {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms')
+            self.stdout.write(f'Throughput:     {rate:.0f} check-ins/s')
+            self.stdout.write(f'SQL statements: {counter.statements / len(outcomes):.1f} per check-in')
+            self.stdout.write(f'Rollups:        {applied} queued check-ins applied in {apply_elapsed * 1000:.0f} ms')
+
+            if rows != len(users) or recorded != len(users):
+                raise CommandError('Check-in counts do not match the number of students')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} rollup row(s) differ from raw attendance after applying the queue')
+            # The target is for PostgreSQL; SQLite serializes every write
+            if rate >= options['target']:
+                self.stdout.write(self.style.SUCCESS(f'✓ Target of {options["target"]:.0f}/s met on {connection.vendor}'))
+            else:
+                self.stdout.write(self.style.WARNING(f'✗ Below target of {options["target"]:.0f}/s on {connection.vendor}'))
+        finally:
+            if not options['keep']:
+                self._remove_fixture(prefix)
+
+    def _run_chunk(self, check_in, user_ids, counter):
+        results = []
+        try:
+            with observe_queries(counter):
+                for user_id in user_ids:
+                    started = time.perf_counter()
+                    outcome = check_in(user_id)
+                    results.append((outcome, time.perf_counter() - started))
+        finally:
+            connections.close_all()
+        return results
+
+    def _direct_check_in(self, session):
+        def check_in(user_id):
+            outcome, _ = record_checkin(session.id, user_id, session.checkin_code)
+            return outcome
+        return check_in
+
+    def _http_check_in(self, session, users):
+        url = reverse('api_checkin', args=[session.id])
+        users = {user.id: user for user in users}
+
+        def check_in(user_id):
+            client = Client()
+            client.force_login(users[user_id])
+            response = client.post(url, {'checkin_code': session.checkin_code})
+            return response.json()['result']
+        return check_in
+
+    def _create_fixture(self, prefix, count):
+        today = timezone.localdate()
+        User.objects.bulk_create(
+            [User(username=f'{prefix}_{i}') for i in range(count)],
+            batch_size=1000,
+        )
+        users = list(User.objects.filter(username__startswith=f'{prefix}_'))
+        Student.objects.bulk_create(
+            [
+                Student(
+                    user=user,
+                    student_id=f'{prefix}{i:06d}',
+                    first_name='Load',
+                    last_name=f'Test{i}',
+                    email=f'{prefix.lower()}_{i}@loadtest.invalid',
+                    date_of_birth=date(2000, 1, 1),
+                )
+                for i, user in enumerate(users)
+            ],
+            batch_size=1000,
+        )
+        course = Course.objects.create(code=prefix, name='Check-in load test', capacity=count)
+        Course.students.through.objects.bulk_create(
+            [
+                Course.students.through(course_id=course.id, student_id=student_id)
+                for student_id in Student.objects.filter(student_id__startswith=prefix).values_list('id', flat=True)
+            ],
+            batch_size=1000,
+        )
+        session = AttendanceSession.objects.create(
+            course=course,
+            date=today,
+            start_time=dtime(0, 0),
+            end_time=dtime(23, 59, 59),
+            checkin_code='LOAD',
+        )
+        return session, users
+
+    def _remove_fixture(self, prefix):
+        Course.objects.filter(code=prefix).delete()
+        Student.objects.filter(student_id__startswith=prefix).delete()
+        User.objects.filter(username__startswith=f'{prefix}_').delete()
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.utils import OperationalError
+
+from attendance.preflight import check_cache, check_database, pending_migrations
+
+
+class Command(BaseCommand):
+    help = (
+        'Check the database, migrations and cache before starting the server. Run it as a '
+        'release/pre-start step; the app itself no longer touches the database at import time'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--migrate', action='store_true', help='Apply pending migrations instead of failing')
+        parser.add_argument('--wait', type=int, default=0, help='Seconds to keep retrying an unreachable database')
+
+    def handle(self, *args, **options):
+        deadline = time.monotonic() + options['wait']
+        while True:
+            try:
+                latency = check_database()
+                break
+            except OperationalError as exc:
+                if time.monotonic() >= deadline:
+                    raise CommandError(f'✗ Database unreachable: {exc}')
+                self.stdout.write(self.style.WARNING(f'Database not ready ({exc}); retrying in 2 seconds...'))
+                time.sleep(2)
+        self.stdout.write(self.style.SUCCESS(f'✓ Database reachable ({latency:.1f} ms)'))
+
+        pending = pending_migrations()
+        if pending and options['migrate']:
+            self.stdout.write(f'Applying {len(pending)} migrations...')
+            call_command('migrate', interactive=False, verbosity=options['verbosity'])
+            pending = pending_migrations()
+        if pending:
+            for name in pending:
+                self.stdout.write(f'  {name}')
+            raise CommandError(f'✗ {len(pending)} migrations not applied. Run with --migrate or `manage.py migrate`.')
+        self.stdout.write(self.style.SUCCESS('✓ Migrations applied'))
+
+        try:
+            cache_ok = check_cache()
+        except Exception as exc:
+            raise CommandError(f'✗ Cache unavailable: {exc}')
+        if cache_ok:
+            self.stdout.write(self.style.SUCCESS('✓ Cache answering'))
+        else:
+            self.stdout.write(self.style.WARNING('Cache does not store values (dummy backend?)'))
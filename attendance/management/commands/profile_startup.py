@@ -0,0 +1,116 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: import the WSGI application, then serve one
+# request through it, printing the phase timings as JSON
+STARTUP_SCRIPT = '''
+import json, sys, time
+from io import BytesIO
+started = time.perf_counter()
+import attendance_system.wsgi as wsgi
+loaded = time.perf_counter()
+from django.conf import settings
+host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '', 'SERVER_NAME': host,
+    'SERVER_PORT': '80', 'HTTP_HOST': host, 'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http',
+    'wsgi.errors': sys.stderr, 'SERVER_PROTOCOL': 'HTTP/1.1',
+}
+status = []
+body = wsgi.application(environ, lambda line, headers, exc_info=None: status.append(line))
+b''.join(body)
+body.close()
+done = time.perf_counter()
+print(json.dumps({
+    'import_ms': (loaded - started) * 1000,
+    'first_request_ms': (done - loaded) * 1000,
+    'status': status[0] if status else '',
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """Rows (module, self_us, cumulative_us, depth) of a -X importtime report."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip(' ')
+        rows.append((stripped, int(self_us), int(cumulative_us), (len(name) - len(stripped) - 1) // 2))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure startup in a fresh interpreter: -X importtime of attendance_system.wsgi and '
+        'the time to serve the first request, so startup regressions show up'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/health/live/', help='Path of the first request')
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to start (median reported)')
+        parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive')
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'attendance_system.settings'))
+        runs = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, options['path']],
+                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+            )
+            wall_ms = (time.perf_counter() - started) * 1000
+            if result.returncode != 0:
+                raise CommandError(f'Startup failed:\n{result.stderr[-2000:]}')
+            timings = json.loads(result.stdout.strip().splitlines()[-1])
+            timings['process_ms'] = wall_ms
+            runs.append((timings, parse_importtime(result.stderr)))
+
+        median = {
+            key: round(statistics.median(timings[key] for timings, _ in runs), 1)
+            for key in ('import_ms', 'first_request_ms', 'process_ms')
+        }
+        # Imports of the median run by process time
+        _, imports = sorted(runs, key=lambda run: run[0]['process_ms'])[len(runs) // 2]
+        top_level = sorted((row for row in imports if row[3] == 0), key=lambda row: row[2], reverse=True)
+        slowest = sorted(imports, key=lambda row: row[1], reverse=True)
+
+        self.stdout.write(f'First request: GET {options["path"]} -> {runs[-1][0]["status"]}')
+        self.stdout.write(f'{"import attendance_system.wsgi":<36}{median["import_ms"]:9.1f} ms')
+        self.stdout.write(f'{"first request":<36}{median["first_request_ms"]:9.1f} ms')
+        self.stdout.write(f'{"process start to first response":<36}{median["process_ms"]:9.1f} ms')
+        self.stdout.write(self.style.MIGRATE_HEADING('Top-level imports (cumulative)'))
+        for name, _, cumulative_us, _ in top_level[:options['top']]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} ms  {name}')
+        self.stdout.write(self.style.MIGRATE_HEADING('Slowest modules (self)'))
+        for name, self_us, _, _ in slowest[:options['top']]:
+            self.stdout.write(f'  {self_us / 1000:8.1f} ms  {name}')
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({
+                    'path': options['path'],
+                    'runs': options['runs'],
+                    **median,
+                    'top_level_imports': [
+                        {'module': name, 'cumulative_ms': round(us / 1000, 2)} for name, _, us, _ in top_level[:options['top']]
+                    ],
+                    'slowest_modules': [
+                        {'module': name, 'self_ms': round(us / 1000, 2)} for name, us, _, _ in slowest[:options['top']]
+                    ],
+                }, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Time to first response {median["process_ms"]:.0f} ms (median of {options["runs"]})'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the attendance rollup tables from raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help='Limit to a course id (repeatable). Defaults to every course.',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare the stored rollups with raw attendance; do not write.',
+        )
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids']
+
+        if options['verify']:
+            mismatches = verify_rollups(course_ids)
+            for model_name, key, stored, expected in mismatches[:20]:
+                self.stdout.write(f'{model_name} {key}: stored={stored} expected={expected}')
+            if mismatches:
+                raise CommandError(
+                    f'{len(mismatches)} rollup rows differ from raw attendance. '
+                    'Run rebuild_rollups to repair them.'
+                )
+            self.stdout.write(self.style.SUCCESS('✓ Rollup tables match raw attendance'))
+            return
+
+        written = rebuild_rollups(course_ids)
+        for model_name, count in written.items():
+            self.stdout.write(f'{model_name}: {count} rows')
+        self.stdout.write(self.style.SUCCESS('✓ Rollup tables rebuilt'))
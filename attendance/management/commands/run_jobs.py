@@ -0,0 +1,84 @@
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from attendance.jobs import claim_job, requeue_stale_jobs, run_job
+from attendance.rollups import apply_pending_checkins
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued imports and report exports (database-backed job queue, no broker needed) '
+        'and apply queued check-ins to the attendance rollups'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Jobs run concurrently (threads)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        self.worker_name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stop = threading.Event()
+        workers = max(1, options['workers'])
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+        self.stdout.write(f'Job worker {self.worker_name} started with {workers} thread(s)')
+        with ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix='attendance-job') as executor:
+            loops = [
+                executor.submit(self.work, index, options['poll_interval'], options['once'])
+                for index in range(workers)
+            ]
+            checkins = executor.submit(self.apply_checkins, options['poll_interval'], options['once'])
+            try:
+                processed = sum(loop.result() for loop in loops)
+            except KeyboardInterrupt:
+                self.stop.set()
+                self.stdout.write('Stopping after the running jobs finish...')
+                processed = sum(loop.result() for loop in loops)
+            self.stop.set()
+            applied = checkins.result()
+        self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} job(s) and {applied} queued check-in(s)'))
+
+    def apply_checkins(self, poll_interval, once):
+        """Apply queued check-ins to the rollups every poll interval; returns how many were applied."""
+        applied = 0
+        try:
+            while True:
+                close_old_connections()
+                applied += apply_pending_checkins()
+                if once or self.stop.wait(poll_interval):
+                    break
+        finally:
+            connection.close()
+        return applied
+
+    def work(self, index, poll_interval, once):
+        """Claim and run jobs until stopped; returns the number of jobs run."""
+        worker = f'{self.worker_name}/{index}'
+        processed = 0
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_job(worker)
+                if job is None:
+                    if once:
+                        break
+                    self.stop.wait(poll_interval)
+                    continue
+                job = run_job(job)
+                processed += 1
+                if job.status == 'completed':
+                    self.stdout.write(self.style.SUCCESS(f'✓ {job}: {job.message}'))
+                else:
+                    self.stdout.write(self.style.ERROR(f'✗ {job}: {job.error.strip().splitlines()[-1]}'))
+        finally:
+            connection.close()
+        return processed
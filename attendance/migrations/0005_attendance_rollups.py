@@ -0,0 +1,90 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+STATUSES = ['present', 'absent', 'late', 'excused']
+
+
+def populate_rollups(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    counters = {'total': Count('id')}
+    counters.update({status: Count('id', filter=Q(status=status)) for status in STATUSES})
+    levels = [
+        ('SessionAttendanceSummary', {'session_id': 'session_id'}),
+        ('StudentCourseSummary', {'student_id': 'student_id', 'course_id': 'session__course_id'}),
+        ('CourseDailySummary', {'course_id': 'session__course_id', 'date': 'session__date'}),
+    ]
+    for model_name, keys in levels:
+        model = apps.get_model('attendance', model_name)
+        rows = Attendance.objects.order_by().values(*keys.values()).annotate(**counters)
+        model.objects.bulk_create(
+            [
+                model(
+                    **{field: row[lookup] for field, lookup in keys.items()},
+                    **{name: row[name] for name in counters},
+                )
+                for row in rows
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_checkin_time_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionAttendanceSummary',
+            fields=[
+                ('total', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='attendance.attendancesession')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('date', models.DateField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='attendance.course')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('course', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StudentCourseSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.IntegerField(default=0)),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('late', models.IntegerField(default=0)),
+                ('excused', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_summaries', to='attendance.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_summaries', to='attendance.student')),
+            ],
+            options={
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
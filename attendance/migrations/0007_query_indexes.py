@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 02:51
+
+from django.db import migrations, models
+
+# (name, key fields, included fields). The included columns make these
+# covering indexes where the database supports INCLUDE (PostgreSQL); other
+# databases get the plain index, which is what the model state records.
+COVERING_INDEXES = [
+    ('att_student_status_idx', ['student', 'status'], ['session']),
+    ('att_session_status_idx', ['session', 'status'], ['student']),
+]
+
+
+def add_covering_indexes(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    covering = schema_editor.connection.features.supports_covering_indexes
+    for name, fields, include in COVERING_INDEXES:
+        schema_editor.add_index(Attendance, models.Index(fields=fields, include=include if covering else (), name=name))
+
+
+def remove_covering_indexes(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    for name, fields, _ in COVERING_INDEXES:
+        schema_editor.remove_index(Attendance, models.Index(fields=fields, name=name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_background_jobs'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='attendance',
+                    index=models.Index(fields=['student', 'status'], name='att_student_status_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='attendance',
+                    index=models.Index(fields=['session', 'status'], name='att_session_status_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_covering_indexes, remove_covering_indexes),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('status', 'absent')), fields=['student'], name='att_absent_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancesession',
+            index=models.Index(fields=['date', 'start_time'], name='session_date_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_name', 'first_name'], name='student_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentimportlog',
+            index=models.Index(fields=['course', '-created_at'], name='importlog_course_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesession',
+            name='rotating_code',
+            field=models.BooleanField(default=False, help_text='Require a check-in code that changes every few seconds (shown as a QR code)'),
+        ),
+    ]
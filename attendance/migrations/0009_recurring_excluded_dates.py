@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_session_rotating_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringsession',
+            name='excluded_dates',
+            field=models.JSONField(blank=True, default=list, help_text='YYYY-MM-DD dates without a session (e.g. holidays)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_recurring_excluded_dates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringsession',
+            name='lazy',
+            field=models.BooleanField(default=False, help_text='Create each session on first use (check-in, marking or opening it) instead of all up front'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:30
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def _streak(statuses, status):
+    count = 0
+    for value in statuses:
+        if value != status:
+            break
+        count += 1
+    return count
+
+
+def populate_risk(apps, schema_editor):
+    # Same window as attendance.risk: each course's last sessions with
+    # attendance taken, a missing row counting as absent
+    AttendanceSession = apps.get_model('attendance', 'AttendanceSession')
+    Attendance = apps.get_model('attendance', 'Attendance')
+    Course = apps.get_model('attendance', 'Course')
+    StudentRisk = apps.get_model('attendance', 'StudentRisk')
+
+    ranked = AttendanceSession.objects.filter(summary__total__gt=0).order_by().annotate(
+        recent=Window(RowNumber(), partition_by=[F('course_id')], order_by=[F('date').desc(), F('start_time').desc()]),
+    )
+    windows = defaultdict(list)
+    for course_id, session_id, day in (
+        ranked.filter(recent__lte=settings.RISK_WINDOW_SESSIONS)
+        .values_list('course_id', 'id', 'date').order_by('course_id', 'recent')
+    ):
+        windows[course_id].append((session_id, day))
+
+    for course_id, sessions in windows.items():
+        attendance = Attendance.objects.filter(session_id__in=[session_id for session_id, _ in sessions])
+        recorded = {
+            (student_id, session_id): status
+            for student_id, session_id, status in attendance.values_list('student_id', 'session_id', 'status')
+        }
+        risks = []
+        for student_id in Course.students.through.objects.filter(course_id=course_id).values_list('student_id', flat=True):
+            statuses = [recorded.get((student_id, session_id), 'absent') for session_id, _ in sessions]
+            absences = statuses.count('absent')
+            risks.append(StudentRisk(
+                student_id=student_id,
+                course_id=course_id,
+                window_sessions=len(statuses),
+                window_absences=absences,
+                window_lates=statuses.count('late'),
+                absence_rate=round(absences / len(statuses) * 100, 1),
+                absence_streak=_streak(statuses, 'absent'),
+                late_streak=_streak(statuses, 'late'),
+                last_session_date=sessions[0][1],
+            ))
+        StudentRisk.objects.bulk_create(risks, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_recurring_lazy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentRisk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_sessions', models.PositiveIntegerField(default=0)),
+                ('window_absences', models.PositiveIntegerField(default=0)),
+                ('window_lates', models.PositiveIntegerField(default=0)),
+                ('absence_rate', models.FloatField(default=0, help_text='Percentage of the window absent')),
+                ('absence_streak', models.PositiveIntegerField(default=0, help_text='Latest sessions absent in a row')),
+                ('late_streak', models.PositiveIntegerField(default=0, help_text='Latest sessions late in a row')),
+                ('last_session_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_risks', to='attendance.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risks', to='attendance.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['absence_rate'], name='risk_absence_rate_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(populate_risk, migrations.RunPython.noop),
+    ]
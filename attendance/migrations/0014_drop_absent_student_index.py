@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 04:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0013_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendance',
+            name='att_absent_student_idx',
+        ),
+    ]
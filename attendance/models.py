@@ -41,6 +41,10 @@ class Student(models.Model):
     
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Default ordering: student list and report ordering by name
+            models.Index(fields=['last_name', 'first_name'], name='student_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student_id} - {self.first_name} {self.last_name}"
@@ -63,7 +67,10 @@ class Course(models.Model):
         return f"{self.code} - {self.name}"
     
     def get_enrollment_percentage(self):
-        total = self.students.count()
+        # Use the count annotated by list views when present
+        total = getattr(self, 'student_count', None)
+        if total is None:
+            total = self.students.count()
         if total == 0:
             return 0
         return round((total / self.capacity * 100), 1)
@@ -74,6 +81,7 @@ class AttendanceSession(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     checkin_code = models.CharField(max_length=32, blank=True, null=True, help_text='Optional simple code students can enter to check in')
+    rotating_code = models.BooleanField(default=False, help_text='Require a check-in code that changes every few seconds (shown as a QR code)')
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     duration = models.IntegerField(help_text="Duration in minutes", default=60)
@@ -83,16 +91,27 @@ class AttendanceSession(models.Model):
     class Meta:
         ordering = ['-date', '-start_time']
         unique_together = ['course', 'date', 'start_time']
+        # (course, date) lookups use the unique index above
+        indexes = [
+            # Today's / this week's sessions in the default ordering
+            models.Index(fields=['date', 'start_time'], name='session_date_start_idx'),
+        ]
     
     def __str__(self):
         return f"{self.course.code} - {self.date}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
     def get_attendance_percentage(self):
-        total = self.attendances.count()
-        present = self.attendances.filter(status='present').count()
-        if total == 0:
+        try:
+            summary = self.summary
+        except SessionAttendanceSummary.DoesNotExist:
             return 0
-        return round((present / total * 100), 1)
+        return summary.get_statistics()['attendance_rate']
 
 class Attendance(models.Model):
     STATUS_CHOICES = [
@@ -112,9 +131,122 @@ class Attendance(models.Model):
     class Meta:
         unique_together = ['session', 'student']
         ordering = ['student__last_name']
+        indexes = [
+            # A student's history and status counts. On PostgreSQL migration
+            # 0007 creates these two as covering indexes (INCLUDE the other
+            # key), which other databases cannot do.
+            models.Index(fields=['student', 'status'], name='att_student_status_idx'),
+            # Per-session status counts and rosters
+            models.Index(fields=['session', 'status'], name='att_session_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student} - {self.session} - {self.status}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored state so rollups can apply the exact delta on save
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+class AttendanceCounters(models.Model):
+    """Status counters shared by the attendance rollup tables."""
+    total = models.IntegerField(default=0)
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    late = models.IntegerField(default=0)
+    excused = models.IntegerField(default=0)
+    
+    class Meta:
+        abstract = True
+    
+    def get_statistics(self):
+        from .statistics import build_statistics
+        return build_statistics({
+            'total': self.total,
+            'present': self.present,
+            'absent': self.absent,
+            'late': self.late,
+            'excused': self.excused,
+        })
+
+
+class SessionAttendanceSummary(AttendanceCounters):
+    """Attendance counters for one session, maintained incrementally."""
+    session = models.OneToOneField(AttendanceSession, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    
+    def __str__(self):
+        return f"{self.session} ({self.total} records)"
+
+
+class StudentCourseSummary(AttendanceCounters):
+    """Attendance counters for one student in one course."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='course_summaries')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_summaries')
+    
+    class Meta:
+        unique_together = ['student', 'course']
+    
+    def __str__(self):
+        return f"{self.student} - {self.course.code} ({self.total} records)"
+
+
+class CourseDailySummary(AttendanceCounters):
+    """Attendance counters for one course on one day."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_summaries')
+    date = models.DateField()
+    
+    class Meta:
+        unique_together = ['course', 'date']
+        ordering = ['date']
+    
+    def __str__(self):
+        return f"{self.course.code} - {self.date} ({self.total} records)"
+
+
+class PendingCheckin(models.Model):
+    """A check-in whose rollup and risk index updates have not been applied yet.
+
+    The check-in path only queues the row; attendance.rollups folds the
+    queue into the next rollup update.
+    """
+    session = models.ForeignKey(AttendanceSession, on_delete=models.CASCADE, related_name='+')
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='+')
+    status = models.CharField(max_length=10, choices=Attendance.STATUS_CHOICES)
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.session_id} - {self.status}"
+
+
+class StudentRisk(models.Model):
+    """Recent absence pattern of one student in one course, maintained by attendance.risk.
+
+    The window is the course's last settings.RISK_WINDOW_SESSIONS sessions
+    with attendance taken; a session without a row for the student counts
+    as absent. Streaks count back within the window.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='risks')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_risks')
+    window_sessions = models.PositiveIntegerField(default=0)
+    window_absences = models.PositiveIntegerField(default=0)
+    window_lates = models.PositiveIntegerField(default=0)
+    absence_rate = models.FloatField(default=0, help_text='Percentage of the window absent')
+    absence_streak = models.PositiveIntegerField(default=0, help_text='Latest sessions absent in a row')
+    late_streak = models.PositiveIntegerField(default=0, help_text='Latest sessions late in a row')
+    last_session_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['student', 'course']
+        indexes = [
+            # "Students above X% absence": a range scan, highest rate first
+            models.Index(fields=['absence_rate'], name='risk_absence_rate_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student} - {self.course.code} ({self.absence_rate}% absent)"
 
 
 class RecurringSession(models.Model):
@@ -133,8 +265,10 @@ class RecurringSession(models.Model):
     end_time = models.TimeField()
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='weekly')
     day_of_week = models.IntegerField(default=0, help_text='0=Monday, 6=Sunday (for weekly/biweekly)')
+    excluded_dates = models.JSONField(default=list, blank=True, help_text='YYYY-MM-DD dates without a session (e.g. holidays)')
     notes = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    lazy = models.BooleanField(default=False, help_text='Create each session on first use (check-in, marking or opening it) instead of all up front')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -144,32 +278,12 @@ class RecurringSession(models.Model):
     def __str__(self):
         return f"{self.course.code} - {self.frequency.title()}"
     
-    def generate_sessions(self):
-        """Generate individual sessions based on recurrence pattern"""
-        from datetime import timedelta
-        sessions = []
-        current_date = self.start_date
-        
-        while current_date <= self.end_date:
-            if self.frequency == 'daily':
-                sessions.append(current_date)
-                current_date += timedelta(days=1)
-            elif self.frequency == 'weekly':
-                if current_date.weekday() == self.day_of_week:
-                    sessions.append(current_date)
-                current_date += timedelta(days=1)
-            elif self.frequency == 'biweekly':
-                if current_date.weekday() == self.day_of_week:
-                    sessions.append(current_date)
-                    current_date += timedelta(days=14)
-                else:
-                    current_date += timedelta(days=1)
-            elif self.frequency == 'monthly':
-                if current_date.day == self.start_date.day:
-                    sessions.append(current_date)
-                current_date += timedelta(days=1)
-        
-        return sessions
+    def generate_sessions(self, exclude=()):
+        """Dates of the sessions of this template, without its excluded dates or those in ``exclude``"""
+        from datetime import date
+        from .recurrence import recurrence_dates
+        exclude = set(exclude) | {date.fromisoformat(day) for day in self.excluded_dates}
+        return recurrence_dates(self.frequency, self.start_date, self.end_date, self.day_of_week, exclude)
 
 
 class StudentImportLog(models.Model):
@@ -194,6 +308,46 @@ class StudentImportLog(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['course', '-created_at'], name='importlog_course_recent_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.course.code} - {self.file_name} ({self.status})"
\ No newline at end of file
+        return f"{self.course.code} - {self.file_name} ({self.status})"
+
+class BackgroundJob(models.Model):
+    """Import or export queued for the run_jobs worker"""
+    KIND_CHOICES = [
+        ('student_import', 'Student Import'),
+        ('report_export', 'Report Export'),
+    ]
+    STATUS_CHOICES = StudentImportLog.STATUS_CHOICES
+    
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    params = models.JSONField(default=dict, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='background_jobs')
+    import_log = models.ForeignKey(StudentImportLog, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    input_file = models.FileField(upload_to='jobs/input/', blank=True)
+    result_file = models.FileField(upload_to='jobs/results/', blank=True)
+    processed_items = models.IntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last sign of life from the worker running the job (claim or progress)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
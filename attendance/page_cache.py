@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .db_router import reading_replica
+
+# Data a cached page part can depend on. Each has a version (the time of
+# its last write) bumped by signals; keys embed the versions they depend
+# on, so a write makes the old entries unreachable and they age out.
+TABLES = ('attendance', 'session', 'course', 'student', 'profile')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def version_key(table):
+    return f'attendance:version:{table}'
+
+
+def bump(*tables):
+    """Mark ``tables`` as written, once the current transaction commits."""
+    def write():
+        now = time.time_ns()
+        cache.set_many({version_key(table): now for table in tables}, None)
+    transaction.on_commit(write)
+
+
+def _versions(found, tables):
+    """Versions of ``tables`` from cache.get_many() results; a lost version restarts at now."""
+    missing = {version_key(table): time.time_ns() for table in tables if version_key(table) not in found}
+    return {**found, **missing}, missing
+
+
+def page_key(name, tables, vary, versions):
+    stamp = '.'.join(str(versions[version_key(table)]) for table in tables)
+    return ':'.join(['attendance:page', name, *map(str, vary), stamp])
+
+
+def _count(name, hit):
+    with _stats_lock:
+        _stats[(name, 'hits' if hit else 'misses')] += 1
+
+
+def _timeout(timeout):
+    timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+    # A lagging replica may build a value older than the versions in its key
+    if reading_replica():
+        timeout = min(timeout, settings.REPLICA_STICKY_SECONDS)
+    return timeout
+
+
+def cached(name, tables, build, vary=(), timeout=None):
+    """Value of ``build()`` cached until one of ``tables`` is written.
+
+    A hit costs one or two cache round trips and no queries. ``vary``
+    separates entries (e.g. per user); ``timeout`` defaults to
+    settings.PAGE_CACHE_TIMEOUT.
+    """
+    versions, missing = _versions(cache.get_many([version_key(table) for table in tables]), tables)
+    if missing:
+        cache.set_many(missing, None)
+    key = page_key(name, tables, vary, versions)
+    value = cache.get(key)
+    _count(name, value is not None)
+    if value is None:
+        value = build()
+        cache.set(key, value, _timeout(timeout))
+    return value
+
+
+async def acached(name, tables, build, vary=(), timeout=None):
+    """cached() for async views; ``build`` is a coroutine function."""
+    versions, missing = _versions(await cache.aget_many([version_key(table) for table in tables]), tables)
+    if missing:
+        await cache.aset_many(missing, None)
+    key = page_key(name, tables, vary, versions)
+    value = await cache.aget(key)
+    _count(name, value is not None)
+    if value is None:
+        value = await build()
+        await cache.aset(key, value, _timeout(timeout))
+    return value
+
+
+def stats():
+    """Hit/miss counts of this process per cached part, most used first."""
+    with _stats_lock:
+        names = {name for name, _ in _stats}
+        rows = [
+            {'name': name, 'hits': _stats[(name, 'hits')], 'misses': _stats[(name, 'misses')]}
+            for name in names
+        ]
+    for row in rows:
+        total = row['hits'] + row['misses']
+        row['hit_rate'] = round(row['hits'] / total * 100, 1) if total else 0
+    rows.sort(key=lambda row: row['hits'] + row['misses'], reverse=True)
+    return rows
+
+
+def current_versions():
+    found = cache.get_many([version_key(table) for table in TABLES])
+    return {table: found.get(version_key(table)) for table in TABLES}
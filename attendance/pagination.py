@@ -0,0 +1,170 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import IntegerField, Q
+
+REPORT_COUNT_TIMEOUT = 60
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from the query string into its JSON list; malformed cursors give None.
+
+    Only the shape is checked here; KeysetPaginator checks the values.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    return key if isinstance(key, list) else None
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterates over its rows like a Paginator page."""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """Seek pagination over a values() queryset.
+
+    Rows are ordered by ``ordering`` (ascending field names that must be
+    present in each row and end with a unique field such as 'id'). Each page
+    filters on the key of the row before or after it instead of using
+    OFFSET, so a deep page costs the same as the first one.
+
+    ``transform`` is applied to the rows of a page after the cursors have
+    been taken from them.
+    """
+
+    def __init__(self, queryset, ordering, per_page=50, transform=None):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.transform = transform
+
+    def _seek(self, key, direction):
+        # (a, b, c) > (x, y, z) expanded so every database can use it
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            step = Q(**{f'{field}__{direction}': key[index]})
+            for previous, value in zip(self.ordering[:index], key):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _key(self, row):
+        return [row[field] for field in self.ordering]
+
+    def _model_field(self, path):
+        model = self.queryset.model
+        *relations, name = path.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def _clean_key(self, key):
+        """Cursor values converted to their fields' types, or None if any does not fit.
+
+        Cursors come from the query string, so a tampered one must give the
+        first page rather than a lookup error.
+        """
+        if key is None or len(key) != len(self.ordering):
+            return None
+        cleaned = []
+        for path, value in zip(self.ordering, key):
+            field = self._model_field(path)
+            # JSON gives ints for integer keys and strings for everything else (dates, times, names)
+            expected = int if isinstance(field, IntegerField) else str
+            if not isinstance(value, expected) or isinstance(value, bool):
+                return None
+            try:
+                cleaned.append(field.to_python(value))
+            except (ValidationError, ValueError, TypeError):
+                return None
+        return cleaned
+
+    def page(self, after=None, before=None, last=False):
+        """Return the page following ``after``, preceding ``before`` or the last page.
+
+        ``after``/``before`` are cursors from a previous page; with none of
+        the arguments the first page is returned.
+        """
+        after = self._clean_key(decode_cursor(after))
+        before = self._clean_key(decode_cursor(before))
+
+        backwards = before is not None or last
+        queryset = self.queryset
+        if backwards:
+            if before is not None:
+                queryset = queryset.filter(self._seek(before, 'lt'))
+            queryset = queryset.order_by(*[f'-{field}' for field in self.ordering])
+        else:
+            if after is not None:
+                queryset = queryset.filter(self._seek(after, 'gt'))
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_previous, has_next = has_more, before is not None
+        else:
+            has_previous, has_next = after is not None, has_more
+
+        next_cursor = encode_cursor(self._key(rows[-1])) if rows and has_next else None
+        previous_cursor = encode_cursor(self._key(rows[0])) if rows and has_previous else None
+        if self.transform is not None:
+            rows = [self.transform(row) for row in rows]
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+
+def estimated_count(model):
+    """Planner row estimate for a whole table on PostgreSQL, else None."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def cached_count(queryset, key_parts, timeout=REPORT_COUNT_TIMEOUT):
+    """Exact count of ``queryset`` cached for ``timeout`` seconds under ``key_parts``."""
+    digest = hashlib.md5(json.dumps(key_parts, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
+    key = f'attendance:count:{queryset.model._meta.label_lower}:{digest}'
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
@@ -0,0 +1,59 @@
+import time
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+# Set once every migration has been seen applied; migrations are not
+# unapplied under a running server, so later readiness checks skip the plan
+_migrated = False
+
+
+def check_database(alias=DEFAULT_DB_ALIAS):
+    """Round trip to the database; returns the latency in ms (raises if unreachable)."""
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return (time.perf_counter() - started) * 1000
+
+
+def pending_migrations(alias=DEFAULT_DB_ALIAS):
+    """Names (app_label.name) of the migrations not applied yet."""
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [f'{migration.app_label}.{migration.name}' for migration, backwards in plan]
+
+
+def check_cache():
+    """Write and read back a key; returns whether the cache answered."""
+    cache.set('attendance:preflight', 1, 10)
+    return cache.get('attendance:preflight') == 1
+
+
+def readiness():
+    """Checks behind the readiness endpoint.
+
+    Returns: (ready, checks) where checks maps each check to its result
+    """
+    global _migrated
+    checks = {}
+    try:
+        checks['database_ms'] = round(check_database(), 2)
+    except Exception as exc:
+        checks['database'] = f'unavailable: {exc}'
+        return False, checks
+
+    if not _migrated:
+        pending = pending_migrations()
+        if pending:
+            checks['pending_migrations'] = pending
+            return False, checks
+        _migrated = True
+    checks['migrations'] = 'applied'
+
+    try:
+        checks['cache'] = 'ok' if check_cache() else 'not storing values'
+    except Exception as exc:
+        checks['cache'] = f'unavailable: {exc}'
+    return True, checks
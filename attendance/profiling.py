@@ -0,0 +1,236 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+from .async_db import observe_queries
+
+# Statements kept per request, slowest first
+SLOWEST_STATEMENTS = 5
+# Fingerprints of queries run more than once, most repeated first
+DUPLICATE_FINGERPRINTS = 5
+
+RECORDS = deque(maxlen=getattr(settings, 'REQUEST_PROFILER_BUFFER', 2000))
+_log_lock = threading.Lock()
+_active_profile = ContextVar('attendance_request_profile', default=None)
+
+_literal = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_placeholder_list = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_whitespace = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN-lists collapsed, so repeats of one query shape match."""
+    sql = _literal.sub('?', sql)
+    sql = _placeholder_list.sub('(...)', sql)
+    return _whitespace.sub(' ', sql).strip()
+
+
+class RequestProfile:
+    """Timings of one request; also the execute_wrapper that times SQL.
+
+    It is called from run_queries() threads as well, hence the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        self.statements = []
+        self.fingerprints = Counter()
+        # Per database alias: [queries, sql_ms]
+        self.databases = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self.lock:
+                self.queries += 1
+                self.sql_ms += elapsed
+                self.fingerprints[fingerprint(sql)] += 1
+                self.statements.append((elapsed, sql))
+                database = self.databases.setdefault(context['connection'].alias, [0, 0.0])
+                database[0] += 1
+                database[1] += elapsed
+
+    def record(self, request, response):
+        match = request.resolver_match
+        return {
+            'at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else '',
+            'status': response.status_code,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'sql_ms': round(self.sql_ms, 2),
+            'template_ms': round(self.template_ms, 2),
+            'queries': self.queries,
+            'databases': {
+                alias: {'queries': queries, 'sql_ms': round(sql_ms, 2)}
+                for alias, (queries, sql_ms) in sorted(self.databases.items())
+            },
+            'slowest': [
+                {'ms': round(ms, 2), 'sql': sql[:500]}
+                for ms, sql in sorted(self.statements, key=lambda item: item[0], reverse=True)[:SLOWEST_STATEMENTS]
+            ],
+            'duplicates': [
+                {'count': count, 'fingerprint': sql[:500]}
+                for sql, count in self.fingerprints.most_common(DUPLICATE_FINGERPRINTS) if count > 1
+            ],
+        }
+
+
+def _timed_render(render):
+    def timed(self, *args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template_ms += (time.perf_counter() - started) * 1000
+    timed.profiled = True
+    return timed
+
+
+def write_log(record):
+    """Append a record to the JSONL log, rotating it to .1 once it is too big."""
+    path = settings.REQUEST_PROFILER_LOG
+    with _log_lock:
+        if os.path.exists(path) and os.path.getsize(path) >= settings.REQUEST_PROFILER_LOG_MAX_BYTES:
+            os.replace(path, f'{path}.1')
+        with open(path, 'a') as handle:
+            handle.write(json.dumps(record) + '\n')
+
+
+def read_log():
+    """Records from the JSONL log and its rotated predecessor, oldest first."""
+    path = settings.REQUEST_PROFILER_LOG
+    records = []
+    for name in (f'{path}.1', path):
+        if not os.path.exists(name):
+            continue
+        with open(name) as handle:
+            records.extend(json.loads(line) for line in handle if line.strip())
+    return records
+
+
+class RequestProfilerMiddleware:
+    """Opt-in (settings.REQUEST_PROFILER) per-request timing and SQL profile.
+
+    Records go to the in-process RECORDS ring buffer and, when
+    settings.REQUEST_PROFILER_LOG is set, to a rolling JSONL file.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILER', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Time the top-level render of every Django template
+        if not getattr(DjangoTemplate.render, 'profiled', False):
+            DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _active_profile.set(profile)
+        try:
+            # Also on run_queries() threads, which use their own connections
+            with observe_queries(profile):
+                response = self.get_response(request)
+        finally:
+            _active_profile.reset(token)
+
+        record = profile.record(request, response)
+        RECORDS.append(record)
+        if settings.REQUEST_PROFILER_LOG:
+            write_log(record)
+        return response
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def summarize(records):
+    """Aggregate profile records per URL name, slowest p95 first.
+
+    Returns: list of dicts with request count, p50/p95/p99 latency, mean
+    query count (overall and per database alias), mean SQL and template
+    time, and the most repeated query fingerprints
+    """
+    by_view = {}
+    for record in records:
+        by_view.setdefault(record['view'] or record['path'], []).append(record)
+
+    rows = []
+    for view, view_records in by_view.items():
+        latencies = sorted(record['total_ms'] for record in view_records)
+        count = len(view_records)
+        duplicates = Counter()
+        database_queries = Counter()
+        for record in view_records:
+            for duplicate in record['duplicates']:
+                duplicates[duplicate['fingerprint']] += duplicate['count']
+            # Records logged before per-alias counts have no 'databases'
+            for alias, database in record.get('databases', {}).items():
+                database_queries[alias] += database['queries']
+        rows.append({
+            'view': view,
+            'requests': count,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+            'mean_queries': round(sum(record['queries'] for record in view_records) / count, 1),
+            'mean_queries_by_alias': {
+                alias: round(queries / count, 1) for alias, queries in sorted(database_queries.items())
+            },
+            'mean_sql_ms': round(sum(record['sql_ms'] for record in view_records) / count, 2),
+            'mean_template_ms': round(sum(record['template_ms'] for record in view_records) / count, 2),
+            'duplicates': duplicates.most_common(3),
+        })
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
+
+
+def pool_stats():
+    """Usage of this process's PostgreSQL connection pools (settings.DB_POOL), per alias.
+
+    Counters (requests, waits, connections) are cumulative since the pool opened.
+    """
+    pools = []
+    for alias in connections:
+        wrapper = connections[alias]
+        if wrapper.vendor != 'postgresql' or not wrapper.settings_dict['OPTIONS'].get('pool'):
+            continue
+        stats = wrapper.pool.get_stats()
+        queued = stats.get('requests_queued', 0)
+        pools.append({
+            'alias': alias,
+            'max_size': stats['pool_max'],
+            'size': stats['pool_size'],
+            'in_use': stats['pool_size'] - stats['pool_available'],
+            'available': stats['pool_available'],
+            'waiting': stats['requests_waiting'],
+            'requests': stats.get('requests_num', 0),
+            'queued': queued,
+            'mean_wait_ms': round(stats.get('requests_wait_ms', 0) / queued, 1) if queued else 0,
+            'timeouts': stats.get('requests_errors', 0),
+            'connections_opened': stats.get('connections_num', 0),
+            'connections_lost': stats.get('connections_lost', 0),
+        })
+    return pools
@@ -0,0 +1,162 @@
+import calendar
+import re
+from datetime import date, timedelta
+
+from . import page_cache
+from .models import AttendanceSession, RecurringSession
+
+# Rows per INSERT when materialising schedules
+BATCH_SIZE = 1000
+
+
+def parse_dates(text):
+    """Set of the YYYY-MM-DD dates in ``text`` (separated by commas or whitespace)."""
+    dates = set()
+    for value in re.split(r'[\s,;]+', text or ''):
+        if not value:
+            continue
+        try:
+            dates.add(date.fromisoformat(value))
+        except ValueError:
+            raise ValueError(f'"{value}" is not a date in YYYY-MM-DD format.')
+    return dates
+
+
+def _add_months(day, months, anchor_day):
+    """``day`` moved ``months`` months on, on ``anchor_day`` or the last day of a shorter month."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def recurrence_dates(frequency, start_date, end_date, day_of_week=0, exclude=()):
+    """Dates of a recurrence between start_date and end_date (inclusive).
+
+    Computed arithmetically, one step per occurrence rather than per day.
+    daily: every day; weekly/biweekly: every 1st/2nd ``day_of_week`` from
+    the first one on or after start_date; monthly: start_date's day of the
+    month, or the last day of months too short for it (31st -> 30th, 28th
+    or 29th). Dates in ``exclude`` (e.g. holidays) are left out.
+    """
+    if end_date < start_date:
+        return []
+    exclude = set(exclude)
+
+    if frequency == 'monthly':
+        dates = []
+        months = 0
+        current = start_date
+        while current <= end_date:
+            dates.append(current)
+            months += 1
+            current = _add_months(start_date, months, start_date.day)
+    else:
+        if frequency == 'daily':
+            first, step = start_date, 1
+        else:
+            first = start_date + timedelta(days=(day_of_week - start_date.weekday()) % 7)
+            step = 14 if frequency == 'biweekly' else 7
+        dates = [first + timedelta(days=offset) for offset in range(0, (end_date - first).days + 1, step)]
+
+    return [day for day in dates if day not in exclude]
+
+
+def template_session(template, day):
+    """Unsaved AttendanceSession of a RecurringSession template on ``day``."""
+    return AttendanceSession(
+        course_id=template.course_id,
+        date=day,
+        start_time=template.start_time,
+        end_time=template.end_time,
+        notes=template.notes,
+        is_recurring=True,
+    )
+
+
+def template_sessions(template, exclude=()):
+    """Unsaved AttendanceSessions of a RecurringSession template."""
+    return [template_session(template, day) for day in template.generate_sessions(exclude)]
+
+
+def materialize_sessions(templates, exclude=()):
+    """Create the sessions of many templates with bulk inserts.
+
+    Sessions that already exist (same course, date and start time) are
+    skipped: existing slots are read with one query, and the insert
+    ignores conflicts so a concurrent run cannot fail it.
+
+    Returns: (created, skipped) counts
+    """
+    sessions = {}
+    total = 0
+    for template in templates:
+        for session in template_sessions(template, exclude):
+            sessions.setdefault((session.course_id, session.date, session.start_time), session)
+            total += 1
+    if not sessions:
+        return 0, 0
+
+    course_ids = {course_id for course_id, _, _ in sessions}
+    dates = [day for _, day, _ in sessions]
+    existing = set(
+        AttendanceSession.objects.filter(
+            course_id__in=course_ids, date__range=(min(dates), max(dates)),
+        ).order_by().values_list('course_id', 'date', 'start_time')
+    )
+    new = [session for key, session in sessions.items() if key not in existing]
+    AttendanceSession.objects.bulk_create(new, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    page_cache.bump('session')
+    return len(new), total - len(new)
+
+
+def lazy_occurrences(course_ids, start, end, existing=None):
+    """Sessions that lazy templates of the courses schedule from start to end, by date and time.
+
+    Occurrences are unsaved AttendanceSessions carrying their ``template``;
+    slots that already have a row are left out. ``existing`` is the set of
+    (course_id, date, start_time) slots with a row, if the caller has it.
+    ``course_ids`` may be a list or a queryset of ids.
+    """
+    templates = RecurringSession.objects.filter(
+        lazy=True, is_active=True, course_id__in=course_ids, start_date__lte=end, end_date__gte=start,
+    ).select_related('course')
+    occurrences = []
+    for template in templates:
+        for day in template.generate_sessions():
+            if start <= day <= end:
+                session = template_session(template, day)
+                session.course = template.course
+                session.template = template
+                occurrences.append(session)
+    if not occurrences:
+        return []
+
+    if existing is None:
+        existing = set(
+            AttendanceSession.objects.filter(
+                course_id__in={session.course_id for session in occurrences}, date__range=(start, end),
+            ).order_by().values_list('course_id', 'date', 'start_time')
+        )
+    occurrences = [
+        session for session in occurrences
+        if (session.course_id, session.date, session.start_time) not in existing
+    ]
+    occurrences.sort(key=lambda session: (session.date, session.start_time))
+    return occurrences
+
+
+def materialize_occurrence(template, day):
+    """The session of a template on ``day``, created on first use.
+
+    Race-free: concurrent first uses all INSERT ... ON CONFLICT DO NOTHING
+    on the (course, date, start time) unique key, then read back the one
+    row. Returns None when the template schedules no session that day.
+    """
+    if not template.is_active or day not in template.generate_sessions():
+        return None
+    session = template_session(template, day)
+    AttendanceSession.objects.bulk_create([session], ignore_conflicts=True)
+    page_cache.bump('session')
+    return AttendanceSession.objects.select_related('course').get(
+        course_id=template.course_id, date=day, start_time=template.start_time,
+    )
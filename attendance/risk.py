@@ -0,0 +1,203 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Attendance, AttendanceSession, Course, SessionAttendanceSummary, StudentRisk
+from .statistics import percentage
+
+BATCH_SIZE = 500
+# Courses whose windows are read together by rebuild_risk()
+COURSE_BATCH_SIZE = 100
+RISK_FIELDS = [
+    'window_sessions', 'window_absences', 'window_lates', 'absence_rate',
+    'absence_streak', 'late_streak', 'last_session_date', 'updated_at',
+]
+
+
+def recent_sessions(course_ids=None):
+    """{course_id: [(session_id, date), ...]} of each course's last RISK_WINDOW_SESSIONS held sessions, newest first.
+
+    A session is held once it has attendance (a rollup total above zero),
+    so sessions not taken yet do not push older ones out of the window.
+    One query: a window function numbers each course's held sessions from
+    the latest back, and only the first ones are returned.
+    """
+    sessions = AttendanceSession.objects.filter(summary__total__gt=0)
+    if course_ids is not None:
+        sessions = sessions.filter(course_id__in=course_ids)
+    ranked = sessions.order_by().annotate(
+        recent=Window(
+            RowNumber(),
+            partition_by=[F('course_id')],
+            order_by=[F('date').desc(), F('start_time').desc()],
+        ),
+    )
+    windows = defaultdict(list)
+    rows = (
+        ranked.filter(recent__lte=settings.RISK_WINDOW_SESSIONS)
+        .values_list('course_id', 'id', 'date')
+        .order_by('course_id', 'recent')
+    )
+    for course_id, session_id, day in rows:
+        windows[course_id].append((session_id, day))
+    return windows
+
+
+def window_statuses(windows, student_ids=None):
+    """{(student_id, course_id): [(status, date), ...]} over each course's window, newest first.
+
+    Every enrolled student (optionally only ``student_ids``) gets the whole
+    window; a session without an attendance row for the student counts as
+    absent. Two queries: the enrolments and the window's attendance rows.
+    """
+    enrolments = Course.students.through.objects.filter(course_id__in=list(windows))
+    attendance = Attendance.objects.filter(
+        session_id__in=[session_id for sessions in windows.values() for session_id, _ in sessions],
+    )
+    if student_ids is not None:
+        enrolments = enrolments.filter(student_id__in=student_ids)
+        attendance = attendance.filter(student_id__in=student_ids)
+    recorded = {
+        (student_id, session_id): status
+        for student_id, session_id, status in attendance.order_by().values_list('student_id', 'session_id', 'status')
+    }
+    return {
+        (student_id, course_id): [
+            (recorded.get((student_id, session_id), 'absent'), day) for session_id, day in windows[course_id]
+        ]
+        for student_id, course_id in enrolments.values_list('student_id', 'course_id')
+    }
+
+
+def _streak(statuses, status):
+    count = 0
+    for value in statuses:
+        if value != status:
+            break
+        count += 1
+    return count
+
+
+def risk_for(student_id, course_id, rows):
+    """StudentRisk for one pair from its (status, date) rows, newest first."""
+    statuses = [status for status, _ in rows]
+    return StudentRisk(
+        student_id=student_id,
+        course_id=course_id,
+        window_sessions=len(statuses),
+        window_absences=statuses.count('absent'),
+        window_lates=statuses.count('late'),
+        absence_rate=percentage(statuses.count('absent'), len(statuses)),
+        absence_streak=_streak(statuses, 'absent'),
+        late_streak=_streak(statuses, 'late'),
+        last_session_date=rows[0][1] if rows else None,
+    )
+
+
+def _save(risks):
+    """Upsert StudentRisk rows in batches; returns how many were written."""
+    risks = iter(risks)
+    count = 0
+    while True:
+        batch = list(islice(risks, BATCH_SIZE))
+        if not batch:
+            return count
+        StudentRisk.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['student', 'course'],
+            update_fields=RISK_FIELDS,
+        )
+        count += len(batch)
+
+
+def moved_windows(session_totals):
+    """Courses whose windows changed because sessions became held, or stopped being held.
+
+    ``session_totals`` maps session ids to the change of their attendance
+    total just applied to the rollups. One query.
+    """
+    if not session_totals:
+        return set()
+    summaries = SessionAttendanceSummary.objects.filter(session_id__in=list(session_totals)).values_list(
+        'session_id', 'session__course_id', 'total',
+    )
+    return {
+        course_id
+        for session_id, course_id, total in summaries
+        if (total > 0) != (total - session_totals[session_id] > 0)
+    }
+
+
+def refresh_risk(pairs, session_totals=None):
+    """Recompute the risk rows of (student_id, course_id) pairs after their attendance changed.
+
+    When a session is taken for the first time (or loses its last row) the
+    window of every student of its course moves, so those courses are
+    rebuilt instead. Otherwise four queries whatever the number of pairs:
+    the windows, enrolments and attendance, then one upsert. Pairs no
+    longer enrolled lose their row.
+    """
+    pairs = set(pairs)
+    moved = moved_windows(session_totals)
+    if moved:
+        rebuild_risk(course_ids=moved)
+        pairs = {(student_id, course_id) for student_id, course_id in pairs if course_id not in moved}
+    if not pairs:
+        return
+    windows = recent_sessions({course_id for _, course_id in pairs})
+    statuses = window_statuses(windows, student_ids={student_id for student_id, _ in pairs})
+    risks = [risk_for(student_id, course_id, rows) for (student_id, course_id), rows in statuses.items()
+             if (student_id, course_id) in pairs and rows]
+    _save(risks)
+    gone = pairs - {(risk.student_id, risk.course_id) for risk in risks}
+    if gone:
+        condition = Q()
+        for student_id, course_id in gone:
+            condition |= Q(student_id=student_id, course_id=course_id)
+        StudentRisk.objects.filter(condition).delete()
+
+
+def rebuild_risk(course_ids=None):
+    """Recompute the risk index (optionally for some courses) from raw attendance.
+
+    Returns: number of rows written
+    """
+    risks = StudentRisk.objects.all()
+    if course_ids:
+        risks = risks.filter(course_id__in=course_ids)
+    written = 0
+    with transaction.atomic():
+        risks.delete()
+        windows = recent_sessions(course_ids or None)
+        courses = iter(list(windows))
+        while True:
+            batch = list(islice(courses, COURSE_BATCH_SIZE))
+            if not batch:
+                return written
+            statuses = window_statuses({course_id: windows[course_id] for course_id in batch})
+            written += _save(risk_for(student_id, course_id, rows) for (student_id, course_id), rows in statuses.items())
+
+
+def is_at_risk(risk):
+    """Whether a StudentRisk row crosses the thresholds students_at_risk() uses by default."""
+    return risk.window_sessions >= settings.RISK_MIN_SESSIONS and risk.absence_rate >= settings.RISK_ABSENCE_RATE
+
+
+def students_at_risk(min_absence_rate=None, min_sessions=None, course_ids=None):
+    """Student x course risk rows at or above an absence rate, highest first (one indexed query).
+
+    Defaults: settings.RISK_ABSENCE_RATE and settings.RISK_MIN_SESSIONS,
+    which keeps courses with only one or two sessions taken from flagging
+    anyone.
+    """
+    min_absence_rate = settings.RISK_ABSENCE_RATE if min_absence_rate is None else min_absence_rate
+    min_sessions = settings.RISK_MIN_SESSIONS if min_sessions is None else min_sessions
+    risks = StudentRisk.objects.filter(absence_rate__gte=min_absence_rate, window_sessions__gte=min_sessions)
+    if course_ids is not None:
+        risks = risks.filter(course_id__in=course_ids)
+    return risks.select_related('student', 'course').order_by('-absence_rate', '-absence_streak')
@@ -0,0 +1,268 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+
+from . import live, page_cache, risk
+from .models import Attendance, PendingCheckin, SessionAttendanceSummary, StudentCourseSummary, CourseDailySummary
+from .session_cache import get_session_context
+from .statistics import STATUSES, status_aggregates
+
+COUNTER_FIELDS = ['total'] + STATUSES
+
+# Rollup model and the Attendance-derived key columns it is grouped by
+ROLLUPS = [
+    (SessionAttendanceSummary, ('session_id',), ('session_id',)),
+    (StudentCourseSummary, ('student_id', 'course_id'), ('student_id', 'session__course_id')),
+    (CourseDailySummary, ('course_id', 'date'), ('session__course_id', 'session__date')),
+]
+
+BATCH_SIZE = 500
+
+
+def _empty_counters():
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def collect_deltas(changes):
+    """Fold attendance changes into per-rollup counter deltas.
+
+    Each change is (session_id, student_id, course_id, date, old_status,
+    new_status); use None as old_status for a new row and as new_status for
+    a deleted row.
+
+    Returns: {rollup model: {key tuple: counters}}
+    """
+    deltas = {model: defaultdict(_empty_counters) for model, _, _ in ROLLUPS}
+    for session_id, student_id, course_id, date, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        keys = {
+            SessionAttendanceSummary: (session_id,),
+            StudentCourseSummary: (student_id, course_id),
+            CourseDailySummary: (course_id, date),
+        }
+        for model, key in keys.items():
+            counters = deltas[model][key]
+            if old_status is not None:
+                counters[old_status] -= 1
+                counters['total'] -= 1
+            if new_status is not None:
+                counters[new_status] += 1
+                counters['total'] += 1
+    return deltas
+
+
+def _adapt(value):
+    if hasattr(value, 'isoformat'):
+        return connection.ops.adapt_datefield_value(value)
+    return value
+
+
+def _upsert(model, key_fields, rows):
+    """Add counter deltas, creating rollup rows that do not exist yet."""
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    key_columns = [qn(model._meta.get_field(field).column) for field in key_fields]
+    counter_columns = [qn(field) for field in COUNTER_FIELDS]
+    columns = key_columns + counter_columns
+    row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    updates = ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in counter_columns)
+
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        sql = (
+            f'INSERT INTO {table} ({", ".join(columns)}) '
+            f'VALUES {", ".join([row_placeholder] * len(batch))} '
+            f'ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET {updates}'
+        )
+        params = []
+        for key, counters in batch:
+            params.extend(_adapt(value) for value in key)
+            params.extend(counters[field] for field in COUNTER_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def _update(model, key_fields, rows):
+    """Add counter deltas to existing rollup rows only.
+
+    Used for status changes and deletions: a missing row means its parent is
+    being deleted (cascade) and there is nothing left to adjust.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    assignments = ', '.join(f'{qn(field)} = {qn(field)} + %s' for field in COUNTER_FIELDS)
+    conditions = ' AND '.join(f'{qn(model._meta.get_field(field).column)} = %s' for field in key_fields)
+    sql = f'UPDATE {table} SET {assignments} WHERE {conditions}'
+    params = [
+        [counters[field] for field in COUNTER_FIELDS] + [_adapt(value) for value in key]
+        for key, counters in rows
+    ]
+    if params:
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def _take_pending():
+    """Remove the queued check-ins (PendingCheckin) and return them as changes."""
+    pending = list(
+        PendingCheckin.objects.select_for_update(of=('self',)).order_by().values_list(
+            'id', 'session_id', 'student_id', 'session__course_id', 'session__date', 'status',
+        )
+    )
+    if pending:
+        PendingCheckin.objects.filter(id__in=[row[0] for row in pending]).delete()
+    return [(session_id, student_id, course_id, date, None, status) for _, session_id, student_id, course_id, date, status in pending]
+
+
+def _apply(changes):
+    deltas = collect_deltas(changes)
+    session_ids = [change[0] for change in changes]
+    transaction.on_commit(lambda: live.notify(session_ids))
+    page_cache.bump('attendance')
+    for model, key_fields, _ in ROLLUPS:
+        inserts = []
+        updates = []
+        for key, counters in deltas[model].items():
+            if not any(counters.values()):
+                continue
+            (inserts if counters['total'] > 0 else updates).append((key, counters))
+        if inserts:
+            _upsert(model, key_fields, inserts)
+        if updates:
+            _update(model, key_fields, updates)
+    # After the rollups: the risk windows are built from sessions' totals
+    risk.refresh_risk(
+        (
+            (student_id, course_id)
+            for _, student_id, course_id, _, old_status, new_status in changes
+            if old_status != new_status
+        ),
+        session_totals={
+            key[0]: counters['total']
+            for key, counters in deltas[SessionAttendanceSummary].items() if counters['total']
+        },
+    )
+
+
+def apply_changes(changes):
+    """Apply attendance changes, and any queued check-ins, to every rollup table atomically.
+
+    The risk index rows of the affected students are recomputed in the same
+    transaction. Live boards watching the changed sessions are woken, and
+    cached page parts depending on attendance expire, once it commits.
+    """
+    # Callers may pass a generator; it is read more than once below
+    changes = list(changes)
+    with transaction.atomic():
+        # Queued inserts first, so a decrement finds the rollup row its insert creates
+        changes += _take_pending()
+        if changes:
+            _apply(changes)
+
+
+def apply_pending_checkins():
+    """Apply queued check-ins to the rollups and risk index; returns how many there were.
+
+    Run by the job worker every poll interval, so rollups trail check-ins
+    by a few seconds. Live boards add the queue to the counts they show
+    (live.load_counts()) instead of applying it.
+    """
+    with transaction.atomic():
+        pending = _take_pending()
+        if pending:
+            _apply(pending)
+    return len(pending)
+
+
+def record_change(session_id, student_id, old_status, new_status, context=None):
+    """Apply a single attendance row change, resolving course and date from the session cache."""
+    if old_status == new_status:
+        return
+    context = context or get_session_context(session_id)
+    if context is None:
+        return
+    apply_changes([
+        (session_id, student_id, context['course_id'], context['date'], old_status, new_status),
+    ])
+
+
+# Full rebuild and verification
+
+def _scoped_attendance(course_ids=None):
+    attendance = Attendance.objects.order_by()
+    if course_ids:
+        attendance = attendance.filter(session__course_id__in=course_ids)
+    return attendance
+
+
+def compute_rollups(model, course_ids=None):
+    """Yield (key, counters) for a rollup level computed from raw attendance."""
+    group_fields = next(group for rollup, _, group in ROLLUPS if rollup is model)
+    rows = _scoped_attendance(course_ids).values(*group_fields).annotate(**status_aggregates())
+    for row in rows.iterator(chunk_size=2000):
+        yield tuple(row[field] for field in group_fields), {field: row[field] for field in COUNTER_FIELDS}
+
+
+def _stored_rollups(model, course_ids=None):
+    stored = model.objects.all()
+    if course_ids:
+        course_lookup = 'session__course_id__in' if model is SessionAttendanceSummary else 'course_id__in'
+        stored = stored.filter(**{course_lookup: course_ids})
+    return stored
+
+
+def rebuild_rollups(course_ids=None):
+    """Recompute the rollup tables (optionally for some courses) from raw attendance.
+
+    Returns: {model name: rows written}
+    """
+    written = {}
+    with transaction.atomic():
+        page_cache.bump('attendance')
+        # Raw attendance already holds the queued check-ins
+        pending = PendingCheckin.objects.all()
+        if course_ids:
+            pending = pending.filter(session__course_id__in=course_ids)
+        pending.delete()
+        for model, key_fields, _ in ROLLUPS:
+            _stored_rollups(model, course_ids).delete()
+            rows = (
+                model(**dict(zip(key_fields, key)), **counters)
+                for key, counters in compute_rollups(model, course_ids)
+            )
+            count = 0
+            while True:
+                batch = list(islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                count += len(batch)
+            written[model.__name__] = count
+    return written
+
+
+def verify_rollups(course_ids=None):
+    """Compare stored rollups with raw attendance, after applying queued check-ins.
+
+    Returns: list of (model name, key, stored counters, expected counters)
+    for every row that differs. Rows whose counters are all zero are treated
+    as missing.
+    """
+    apply_pending_checkins()
+    mismatches = []
+    for model, key_fields, _ in ROLLUPS:
+        expected = dict(compute_rollups(model, course_ids))
+        stored = {}
+        for row in _stored_rollups(model, course_ids).values(*key_fields, *COUNTER_FIELDS).iterator():
+            counters = {field: row[field] for field in COUNTER_FIELDS}
+            if any(counters.values()):
+                stored[tuple(row[field] for field in key_fields)] = counters
+        for key in expected.keys() | stored.keys():
+            if expected.get(key) != stored.get(key):
+                mismatches.append((model.__name__, key, stored.get(key), expected.get(key)))
+    return mismatches
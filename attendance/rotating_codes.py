@@ -0,0 +1,69 @@
+import hmac
+import io
+import time
+
+import segno
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+CODE_DIGITS = 6
+# Larger modules and a quiet zone keep the code readable from the back of a room
+QR_SCALE = 10
+QR_BORDER = 2
+
+
+def _timestamp(now):
+    return now.timestamp() if now is not None else time.time()
+
+
+def time_step(now=None):
+    """Index of the CHECKIN_CODE_STEP-second period containing ``now`` (an aware datetime)."""
+    return int(_timestamp(now) // settings.CHECKIN_CODE_STEP)
+
+
+def code_for_step(session_id, step):
+    """The code of a session during one time step.
+
+    TOTP-style: an HMAC-SHA256 of the session id and step keyed by
+    SECRET_KEY, dynamically truncated to CODE_DIGITS digits (RFC 4226).
+    """
+    digest = salted_hmac('attendance.rotating_codes', f'{session_id}:{step}', algorithm='sha256').digest()
+    offset = digest[-1] & 0x0F
+    value = int.from_bytes(digest[offset:offset + 4], 'big') & 0x7FFFFFFF
+    return str(value % 10 ** CODE_DIGITS).zfill(CODE_DIGITS)
+
+
+def current_code(session_id, now=None):
+    """Returns: (code, step, seconds until the next code) of a session."""
+    timestamp = _timestamp(now)
+    step = int(timestamp // settings.CHECKIN_CODE_STEP)
+    expires_in = (step + 1) * settings.CHECKIN_CODE_STEP - timestamp
+    return code_for_step(session_id, step), step, expires_in
+
+
+def verify_code(session_id, entered, now=None, drift=None):
+    """Whether ``entered`` is the session's code within ``drift`` steps of ``now``.
+
+    Pure computation, no queries. Every step of the window is compared in
+    constant time, so the timing reveals neither a match nor its step.
+    """
+    drift = settings.CHECKIN_CODE_DRIFT if drift is None else drift
+    step = time_step(now)
+    entered = (entered or '').strip().encode()
+    matched = False
+    for candidate in range(step - drift, step + drift + 1):
+        matched |= hmac.compare_digest(entered, code_for_step(session_id, candidate).encode())
+    return matched
+
+
+def qr_svg(session_id, step, url):
+    """SVG QR code of ``url``, the check-in link for ``step`` (cached for the step)."""
+    key = f'attendance:checkin-qr:{session_id}:{step}'
+    svg = cache.get(key)
+    if svg is None:
+        buffer = io.BytesIO()
+        segno.make(url, error='m').save(buffer, kind='svg', scale=QR_SCALE, border=QR_BORDER, xmldecl=False)
+        svg = buffer.getvalue().decode()
+        cache.set(key, svg, settings.CHECKIN_CODE_STEP * 2)
+    return svg
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import AttendanceSession, Course
+
+# Entries are invalidated by signals (see attendance/signals.py); the timeout
+# only bounds how long a missed invalidation can linger.
+SESSION_CONTEXT_TIMEOUT = 60 * 60
+
+
+def session_context_key(session_id):
+    return f'attendance:session-context:v3:{session_id}'
+
+
+def build_session_context(session_id):
+    """Load the check-in context of a session from the database (two queries).
+
+    Returns None if the session does not exist.
+    """
+    session = AttendanceSession.objects.filter(id=session_id).values(
+        'id', 'course_id', 'date', 'start_time', 'end_time', 'checkin_code', 'rotating_code', 'late_cutoff_minutes',
+    ).first()
+    if session is None:
+        return None
+
+    start_dt = timezone.make_aware(datetime.combine(session['date'], session['start_time']))
+    end_dt = timezone.make_aware(datetime.combine(session['date'], session['end_time']))
+
+    enrollments = Course.students.through.objects.filter(
+        course_id=session['course_id'],
+    ).values_list('student_id', 'student__user_id')
+
+    student_ids = set()
+    user_students = {}
+    for student_id, user_id in enrollments:
+        student_ids.add(student_id)
+        if user_id is not None:
+            user_students[user_id] = student_id
+
+    return {
+        'session_id': session['id'],
+        'course_id': session['course_id'],
+        'date': session['date'],
+        'start_dt': start_dt,
+        'end_dt': end_dt,
+        'late_dt': start_dt + timedelta(minutes=session['late_cutoff_minutes'] or 0),
+        'checkin_code': session['checkin_code'] or '',
+        'rotating_code': session['rotating_code'],
+        'student_ids': student_ids,
+        'user_students': user_students,
+    }
+
+
+def get_session_context(session_id):
+    """Return the cached check-in context of a session.
+
+    The context holds the aware check-in window, the late cutoff, the
+    check-in code (static or rotating) and the enrolled student ids (also keyed by user id).
+    """
+    key = session_context_key(session_id)
+    context = cache.get(key)
+    if context is None:
+        context = build_session_context(session_id)
+        if context is not None:
+            cache.set(key, context, SESSION_CONTEXT_TIMEOUT)
+    return context
+
+
+def get_session_contexts(session_ids):
+    """Return {session_id: context} for many sessions with one cache round trip."""
+    keys = {session_context_key(session_id): session_id for session_id in session_ids}
+    cached = cache.get_many(keys)
+    contexts = {keys[key]: context for key, context in cached.items()}
+
+    missing = {}
+    for key, session_id in keys.items():
+        if session_id not in contexts:
+            context = build_session_context(session_id)
+            if context is not None:
+                contexts[session_id] = context
+                missing[key] = context
+    if missing:
+        cache.set_many(missing, SESSION_CONTEXT_TIMEOUT)
+    return contexts
+
+
+def is_checkin_open(context, now=None):
+    """Whether the check-in window of a session context contains ``now``."""
+    now = now or timezone.now()
+    return context['start_dt'] <= now <= context['end_dt']
+
+
+def invalidate_session_context(*session_ids):
+    cache.delete_many([session_context_key(session_id) for session_id in session_ids])
+
+
+def invalidate_course_session_contexts(course_ids):
+    """Drop the cached contexts of every session of the given courses."""
+    session_ids = list(
+        AttendanceSession.objects.filter(course_id__in=course_ids).values_list('id', flat=True)
+    )
+    if session_ids:
+        invalidate_session_context(*session_ids)
@@ -0,0 +1,185 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import page_cache
+from .models import Attendance, AttendanceSession, Course, Student, UserProfile
+from .risk import rebuild_risk
+from .rollups import rebuild_rollups, record_change
+from .session_cache import invalidate_course_session_contexts, invalidate_session_context
+
+ROLLUP_STATE_FIELDS = ('session_id', 'student_id', 'status')
+SESSION_BUCKET_FIELDS = ('course_id', 'date')
+
+
+@receiver(post_save, sender=AttendanceSession)
+@receiver(post_delete, sender=AttendanceSession)
+def session_changed(sender, instance, **kwargs):
+    invalidate_session_context(instance.pk)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidate session contexts and the risk index when a course roster changes.
+
+    Handles both directions: course.students.add(...) and
+    student.courses.add(...). A reverse clear() does not provide pk_set, so
+    the affected courses are captured before the rows go away.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._cleared_course_ids = list(instance.courses.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        course_ids = [instance.pk]
+    elif action == 'post_clear':
+        course_ids = getattr(instance, '_cleared_course_ids', [])
+    else:
+        course_ids = list(pk_set or [])
+
+    if course_ids:
+        invalidate_course_session_contexts(course_ids)
+        # Risk covers every enrolled student, recorded or not
+        rebuild_risk(course_ids=course_ids)
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, created, **kwargs):
+    # A new student has no enrolments yet; an edit may relink the user account
+    if created:
+        return
+    invalidate_course_session_contexts(instance.courses.values_list('id', flat=True))
+
+
+# Versions of cached page parts (attendance.page_cache). Attendance writes
+# all go through rollups.apply_changes(), which bumps 'attendance'. Writes
+# that send no signals bump their own versions: check-ins
+# (checkin._upsert_checkin), imports (imports.import_students) and
+# materialised recurring sessions (recurrence).
+
+@receiver(post_save, sender=AttendanceSession)
+@receiver(post_delete, sender=AttendanceSession)
+def session_written(sender, **kwargs):
+    page_cache.bump('session')
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_written(sender, **kwargs):
+    page_cache.bump('course')
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_written(sender, **kwargs):
+    page_cache.bump('student')
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_written(sender, **kwargs):
+    page_cache.bump('profile')
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def enrollment_written(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        page_cache.bump('course', 'student')
+
+
+# Rollup maintenance for single-row ORM writes. Bulk paths (attendance.bulk,
+# attendance.checkin) apply their deltas directly.
+
+@receiver(pre_save, sender=Attendance)
+def attendance_loading_state(sender, instance, **kwargs):
+    # Instances not loaded from the database (or loaded with deferred
+    # fields) need their stored state fetched before it is overwritten.
+    loaded = getattr(instance, '_loaded_values', None)
+    if instance.pk is None or (loaded is not None and all(field in loaded for field in ROLLUP_STATE_FIELDS)):
+        return
+    instance._loaded_values = Attendance.objects.filter(pk=instance.pk).values(*ROLLUP_STATE_FIELDS).first() or {}
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, created, **kwargs):
+    loaded = {} if created else (getattr(instance, '_loaded_values', None) or {})
+    old = tuple(loaded.get(field) for field in ROLLUP_STATE_FIELDS)
+    new = (instance.session_id, instance.student_id, instance.status)
+
+    if old[:2] == new[:2]:
+        record_change(instance.session_id, instance.student_id, old[2], instance.status)
+    else:
+        if old[0] is not None:
+            record_change(old[0], old[1], old[2], None)
+        record_change(instance.session_id, instance.student_id, None, instance.status)
+
+    instance._loaded_values = dict(zip(ROLLUP_STATE_FIELDS, new))
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, origin=None, **kwargs):
+    # Rows deleted along with their session or student are handled in bulk below
+    if isinstance(origin, Attendance) or getattr(origin, 'model', None) is Attendance:
+        record_change(instance.session_id, instance.student_id, instance.status, None)
+
+
+# Deleting a session, course or student cascades to its attendance rows.
+# Instead of one rollup update per row, the courses involved are rebuilt
+# once, after the deleting transaction commits.
+_cascade = threading.local()
+
+
+def _rebuild_after_cascade():
+    course_ids = getattr(_cascade, 'course_ids', set())
+    _cascade.course_ids = set()
+    if course_ids:
+        rebuild_rollups(course_ids=course_ids)
+        rebuild_risk(course_ids=course_ids)
+
+
+def _rebuild_on_commit(course_ids):
+    if not hasattr(_cascade, 'course_ids'):
+        _cascade.course_ids = set()
+    _cascade.course_ids.update(course_ids)
+    # Callbacks after the first find the set empty
+    transaction.on_commit(_rebuild_after_cascade)
+
+
+@receiver(pre_delete, sender=AttendanceSession)
+def session_deleting(sender, instance, **kwargs):
+    # Also sent for each session of a course being deleted
+    _rebuild_on_commit([instance.course_id])
+
+
+@receiver(pre_delete, sender=Student)
+def student_deleting(sender, instance, **kwargs):
+    _rebuild_on_commit(
+        Attendance.objects.filter(student=instance).order_by().values_list('session__course_id', flat=True).distinct()
+    )
+
+
+@receiver(pre_save, sender=AttendanceSession)
+def session_loading_state(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', None)
+    if instance.pk is None or (loaded is not None and all(field in loaded for field in SESSION_BUCKET_FIELDS)):
+        return
+    instance._loaded_values = AttendanceSession.objects.filter(pk=instance.pk).values(*SESSION_BUCKET_FIELDS).first() or {}
+
+
+@receiver(post_save, sender=AttendanceSession)
+def session_moved(sender, instance, created, **kwargs):
+    # Moving a session to another course or date re-buckets its attendance
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or not loaded:
+        instance._loaded_values = {field: getattr(instance, field) for field in SESSION_BUCKET_FIELDS}
+        return
+    if loaded.get('course_id') != instance.course_id or loaded.get('date') != instance.date:
+        course_ids = {loaded.get('course_id'), instance.course_id} - {None}
+        rebuild_rollups(course_ids=course_ids)
+        # The session's place in each student's recent history moved too
+        rebuild_risk(course_ids=course_ids)
+        instance._loaded_values = dict(loaded, course_id=instance.course_id, date=instance.date)
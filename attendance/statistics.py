@@ -0,0 +1,66 @@
+from django.db.models import Count, Q, Sum
+
+from .models import Attendance
+
+STATUSES = [choice for choice, _ in Attendance.STATUS_CHOICES]
+
+# Statuses that count as having attended. This is the single definition of
+# "attendance rate" used by every view, report and export.
+ATTENDED_STATUSES = ('present', 'late')
+
+
+def percentage(part, total):
+    """Return part/total as a percentage rounded to one decimal (0 if total is 0)."""
+    if not total:
+        return 0
+    return round((part / total * 100), 1)
+
+
+def attendance_rate(counts):
+    """Attendance rate for a dict of status counts that includes 'total'."""
+    attended = sum(counts.get(status, 0) for status in ATTENDED_STATUSES)
+    return percentage(attended, counts.get('total', 0))
+
+
+def status_aggregates(prefix='', filter=None):
+    """Conditional Count() expressions for the total and every status.
+
+    ``prefix`` is the lookup path to the Attendance model, e.g. 'attendances__'
+    when aggregating from AttendanceSession or Student. ``filter`` is an
+    optional Q object that further restricts the counted rows.
+    """
+    aggregates = {'total': Count(f'{prefix}id', filter=filter)}
+    for status in STATUSES:
+        condition = Q(**{f'{prefix}status': status})
+        if filter is not None:
+            condition &= filter
+        aggregates[status] = Count(f'{prefix}id', filter=condition)
+    return aggregates
+
+
+def build_statistics(counts):
+    """Turn raw status counts into the statistics dict used by templates."""
+    stats = {'total': counts.get('total') or 0}
+    for status in STATUSES:
+        stats[status] = counts.get(status) or 0
+    for status in STATUSES:
+        stats[f'{status}_pct'] = percentage(stats[status], stats['total'])
+    stats['attendance_rate'] = attendance_rate(stats)
+    return stats
+
+
+def rollup_statistics(queryset):
+    """Sum the counters of a rollup queryset into a statistics dict (one query).
+
+    Works with any AttendanceCounters model, e.g. CourseDailySummary filtered
+    by course and date range, or StudentCourseSummary filtered by student.
+    """
+    counters = ['total'] + STATUSES
+    return build_statistics(queryset.aggregate(**{field: Sum(field) for field in counters}))
+
+
+def summary_statistics(summary):
+    """Statistics for a single rollup row, or zeros when there is none."""
+    if summary is None:
+        return build_statistics({})
+    return summary.get_statistics()
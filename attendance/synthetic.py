@@ -0,0 +1,186 @@
+import random
+from bisect import bisect
+from datetime import date, time, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attendance, AttendanceSession, Course, RecurringSession, Student, UserProfile
+from .risk import rebuild_risk
+from .rollups import rebuild_rollups
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Ada', 'Ben', 'Chloe', 'David', 'Esi', 'Farah', 'Grace', 'Hiro', 'Ivan', 'Joy',
+               'Kofi', 'Lena', 'Musa', 'Nia', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Sam', 'Tariq']
+LAST_NAMES = ['Adams', 'Bello', 'Chen', 'Diallo', 'Evans', 'Fischer', 'Garcia', 'Hassan', 'Ito', 'Jones',
+              'Kim', 'Lopez', 'Mensah', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Smith', 'Tanaka', 'Walker']
+DEPARTMENTS = ['Engineering', 'Science', 'Arts', 'Business', 'Medicine']
+
+# Status mix for a student who turns up; unreliable students are mostly absent
+STATUS_WEIGHTS = {'present': 0.78, 'late': 0.08, 'absent': 0.10, 'excused': 0.04}
+
+
+def _batched(objects, batch_size=BATCH_SIZE):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_insert(model, objects, batch_size=BATCH_SIZE):
+    """bulk_create a (lazy) iterable in batches; returns the number of rows."""
+    count = 0
+    for batch in _batched(objects, batch_size):
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
+
+def plan_institution(rows, class_size=40, weeks=15):
+    """Pick course and student counts that yield roughly ``rows`` attendance rows."""
+    # Courses meet twice a week on average
+    courses = max(1, round(rows / (class_size * weeks * 2)))
+    students = max(class_size, courses * class_size // 4)
+    return {'students': students, 'courses': courses, 'class_size': class_size, 'weeks': weeks}
+
+
+def term_start(weeks, today=None):
+    """Monday of the first week of a term of ``weeks`` weeks ending this week."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=today.weekday(), weeks=weeks - 1)
+
+
+def seed_institution(students, courses, class_size=40, weeks=15, instructors=None, prefix=None,
+                     start=None, seed=None, log=None):
+    """Generate an institution with a term of recurring sessions and attendance.
+
+    Courses get an instructor, a class size spread around ``class_size``
+    and one to three weekly RecurringSession templates; every session up
+    to today gets an attendance row per enrolled student. Every row is
+    written with bulk_create in batches and the rollup tables are rebuilt
+    for the new courses at the end. Codes and usernames start with
+    ``prefix`` so a dataset can be told apart and removed again.
+
+    Returns: dict of row counts per model, plus the prefix
+    """
+    rng = random.Random(seed)
+    prefix = prefix or f'SYN{timezone.now():%m%d%H%M%S}'
+    start = start or term_start(weeks)
+    end = start + timedelta(weeks=weeks, days=-1)
+    today = timezone.localdate()
+    log = log or (lambda message: None)
+    counts = {}
+    class_size = min(class_size, students)
+    if instructors is None:
+        instructors = max(1, courses // 4)
+
+    with transaction.atomic():
+        counts['instructors'] = bulk_insert(User, (
+            User(
+                username=f'{prefix.lower()}_instructor{index}',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                password=make_password(None),
+            )
+            for index in range(instructors)
+        ))
+        instructor_ids = list(User.objects.filter(username__startswith=f'{prefix.lower()}_instructor')
+                              .values_list('id', flat=True))
+        bulk_insert(UserProfile, (UserProfile(user_id=user_id, role='instructor') for user_id in instructor_ids))
+
+        counts['students'] = bulk_insert(Student, (
+            Student(
+                student_id=f'{prefix}-{index:07d}',
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                email=f'{prefix.lower()}.{index}@example.edu',
+                date_of_birth=date(1998, 1, 1) + timedelta(days=rng.randrange(2500)),
+                department=rng.choice(DEPARTMENTS),
+                enrollment_date=start,
+                semester=rng.randint(1, 8),
+            )
+            for index in range(students)
+        ))
+        student_ids = list(Student.objects.filter(student_id__startswith=f'{prefix}-').values_list('id', flat=True))
+        log(f'{counts["students"]} students')
+
+        # Class sizes vary; a few large lectures, mostly smaller groups
+        sizes = [min(students, max(5, round(rng.triangular(0.4, 2.0, 0.8) * class_size))) for _ in range(courses)]
+        counts['courses'] = bulk_insert(Course, (
+            Course(
+                code=f'{prefix}-{index:04d}',
+                name=f'Synthetic course {index}',
+                instructor_id=instructor_ids[index % len(instructor_ids)] if instructor_ids else None,
+                capacity=sizes[index],
+                credits=rng.choice((2, 3, 3, 4)),
+                semester=rng.randint(1, 8),
+            )
+            for index in range(courses)
+        ))
+        course_ids = list(Course.objects.filter(code__startswith=f'{prefix}-').order_by('code')
+                          .values_list('id', flat=True))
+        log(f'{counts["courses"]} courses')
+
+        # Some students attend far less than others
+        reliability = {student_id: rng.betavariate(8, 1.5) for student_id in student_ids}
+        rosters = {course_id: rng.sample(student_ids, size) for course_id, size in zip(course_ids, sizes)}
+        Enrollment = Course.students.through
+        counts['enrollments'] = bulk_insert(Enrollment, (
+            Enrollment(course_id=course_id, student_id=student_id)
+            for course_id, roster in rosters.items() for student_id in roster
+        ))
+
+        templates = []
+        for course_id in course_ids:
+            hour = rng.randrange(8, 17)
+            for weekday in sorted(rng.sample(range(5), rng.choice((1, 2, 2, 3)))):
+                templates.append(RecurringSession(
+                    course_id=course_id, start_date=start, end_date=end, frequency='weekly',
+                    day_of_week=weekday, start_time=time(hour), end_time=time(hour + 1),
+                ))
+        counts['recurring_sessions'] = bulk_insert(RecurringSession, templates)
+        counts['sessions'] = bulk_insert(AttendanceSession, (
+            AttendanceSession(
+                course_id=template.course_id, date=day, start_time=template.start_time,
+                end_time=template.end_time, duration=60, is_recurring=True,
+            )
+            for template in templates for day in template.generate_sessions()
+        ))
+        log(f'{counts["sessions"]} sessions')
+
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(accumulate(STATUS_WEIGHTS.values()))
+
+        def attendance():
+            session_rows = AttendanceSession.objects.filter(
+                course_id__in=course_ids, date__lte=today,
+            ).order_by().values_list('id', 'course_id', 'start_time')
+            for session_id, course_id, start_time in session_rows.iterator(chunk_size=BATCH_SIZE):
+                for student_id in rosters[course_id]:
+                    if rng.random() > reliability[student_id]:
+                        status = 'excused' if rng.random() < 0.2 else 'absent'
+                    else:
+                        status = statuses[bisect(weights, rng.random() * weights[-1])]
+                    checkin = None
+                    if status == 'present':
+                        checkin = time(start_time.hour, rng.randrange(0, 15))
+                    elif status == 'late':
+                        checkin = time(start_time.hour, rng.randrange(15, 45))
+                    yield Attendance(session_id=session_id, student_id=student_id, status=status, checkin_time=checkin)
+
+        counts['attendance'] = 0
+        for batch in _batched(attendance(), BATCH_SIZE * 10):
+            counts['attendance'] += bulk_insert(Attendance, batch)
+            log(f'{counts["attendance"]} attendance rows')
+
+        rebuild_rollups(course_ids=course_ids)
+        rebuild_risk(course_ids=course_ids)
+
+    counts['prefix'] = prefix
+    return counts
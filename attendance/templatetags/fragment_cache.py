@@ -0,0 +1,42 @@
+from django import template
+
+from ..page_cache import cached
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, tables, vary):
+        self.nodelist = nodelist
+        self.name = name
+        self.tables = tables
+        self.vary = vary
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        tables = tuple(self.tables.resolve(context).split())
+        vary = [variable.resolve(context) for variable in self.vary]
+        return cached(f'fragment:{name}', tables, lambda: self.nodelist.render(context), vary=vary)
+
+
+@register.tag
+def cachefragment(parser, token):
+    """Cache the enclosed template output until one of the tables is written.
+
+    {% cachefragment "admin-recent-sessions" "session course attendance" [vary ...] %}
+        ...
+    {% endcachefragment %}
+
+    Querysets evaluated only inside the block are not run on a hit.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a name, a list of tables and optional vary values")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
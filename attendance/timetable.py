@@ -0,0 +1,78 @@
+from django.db.models import BooleanField, Exists, ExpressionWrapper, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Attendance, AttendanceSession
+from .recurrence import lazy_occurrences
+from .statistics import ATTENDED_STATUSES
+
+
+def todays_sessions(student, now=None):
+    """Today's sessions of a student's courses by start time (one query).
+
+    Sessions come with their course and with ``checked_in`` (the student
+    is marked present or late) and ``is_open`` (the check-in window contains
+    ``now``) computed by the database.
+    """
+    now = timezone.localtime(now)
+    clock = now.time()
+    return AttendanceSession.objects.filter(
+        course__students=student,
+        date=now.date(),
+    ).select_related('course').annotate(
+        checked_in=Exists(Attendance.objects.filter(
+            session=OuterRef('pk'), student=student, status__in=ATTENDED_STATUSES,
+        )),
+        is_open=ExpressionWrapper(Q(start_time__lte=clock, end_time__gte=clock), output_field=BooleanField()),
+    ).order_by('start_time')
+
+
+def todays_occurrences(student, sessions, now=None):
+    """Today's sessions of lazy templates of the student's courses that have no row yet (one query).
+
+    ``sessions`` are today's rows from todays_sessions(). Occurrences get
+    the same ``checked_in`` and ``is_open`` attributes.
+    """
+    now = timezone.localtime(now)
+    clock = now.time()
+    existing = {(session.course_id, session.date, session.start_time) for session in sessions}
+    occurrences = lazy_occurrences(student.courses.values('id'), now.date(), now.date(), existing)
+    for occurrence in occurrences:
+        occurrence.checked_in = False
+        occurrence.is_open = occurrence.start_time <= clock <= occurrence.end_time
+    return occurrences
+
+
+def checkin_url(session):
+    """Where a student posts a check-in: the session, or the occurrence that creates it."""
+    if session.pk:
+        return reverse('student_checkin', args=[session.pk])
+    return reverse('occurrence_checkin', args=[session.template.id, session.date.isoformat()])
+
+
+def todays_schedule(student, now=None):
+    """todays_sessions() and todays_occurrences() by start time, each with its ``checkin_url``."""
+    sessions = list(todays_sessions(student, now))
+    sessions += todays_occurrences(student, sessions, now)
+    sessions.sort(key=lambda session: session.start_time)
+    for session in sessions:
+        session.checkin_url = checkin_url(session)
+    return sessions
+
+
+def session_feed(sessions):
+    """Compact rows of todays_schedule() for the mobile poller."""
+    return [
+        {
+            'id': session.id,
+            'course': session.course.code,
+            'name': session.course.name,
+            'start': session.start_time.strftime('%H:%M'),
+            'end': session.end_time.strftime('%H:%M'),
+            'open': session.is_open,
+            'checked_in': session.checked_in,
+            'code_required': bool(session.checkin_code) or session.rotating_code,
+            'checkin_url': session.checkin_url,
+        }
+        for session in sessions
+    ]
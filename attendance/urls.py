@@ -49,12 +49,25 @@ urlpatterns = [
     path('courses/<int:course_id>/import/', views.bulk_import_students, name='bulk_import_students'),
     path('courses/<int:course_id>/imports/', views.import_logs, name='import_logs'),
     
+    # Background jobs
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='job_status'),
+    
     # Session and Attendance URLs
     path('sessions/<int:session_id>/', views.session_detail, name='session_detail'),
     path('sessions/<int:session_id>/export/', views.export_attendance, name='export_attendance'),
     path('sessions/<int:session_id>/mark/', views.mark_attendance, name='mark_attendance'),
     path('sessions/<int:session_id>/manual/', views.manual_attendance, name='manual_attendance'),
+    path('sessions/<int:session_id>/attendance/batch/', views.attendance_batch, name='attendance_batch'),
     path('sessions/<int:session_id>/checkin/', views.student_checkin, name='student_checkin'),
+    path('api/sessions/<int:session_id>/checkin/', views.api_checkin, name='api_checkin'),
+    path('sessions/<int:session_id>/events/', views.session_events, name='session_events'),
+    path('api/sessions/<int:session_id>/live/', views.session_live, name='session_live'),
+    path('api/sessions/<int:session_id>/code/', views.session_code, name='session_code'),
+    path('sessions/<int:session_id>/code.svg', views.session_code_qr, name='session_code_qr'),
+    path('recurring/<int:template_id>/<str:day>/open/', views.occurrence_open, name='occurrence_open'),
+    path('recurring/<int:template_id>/<str:day>/checkin/', views.occurrence_checkin, name='occurrence_checkin'),
 
     # Reports
     path('reports/attendance/', views.attendance_report, name='attendance_report'),
@@ -64,4 +77,13 @@ urlpatterns = [
 
     # Student: My Sessions
     path('my-sessions/', views.my_sessions, name='my_sessions'),
+    path('api/my-sessions/', views.my_sessions_feed, name='my_sessions_feed'),
+
+    # Staff: request profiler and page cache stats
+    path('profiler/', views.request_profiler, name='request_profiler'),
+    path('cache/stats/', views.page_cache_stats, name='page_cache_stats'),
+
+    # Health checks
+    path('health/live/', views.health_live, name='health_live'),
+    path('health/ready/', views.health_ready, name='health_ready'),
 ]
\ No newline at end of file
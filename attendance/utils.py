@@ -2,213 +2,114 @@ import csv
 from django.http import HttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
-import io
+
+from .statistics import attendance_rate, percentage, rollup_statistics, summary_statistics
 
 def export_attendance_csv(session):
-    """Generate CSV export of attendance for a session."""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="attendance_{session.id}_{timezone.now().strftime("%Y%m%d")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow(['Student ID', 'Name', 'Email', 'Status', 'Remarks', 'Recorded At'])
-    
-    attendances = session.attendances.all().select_related('student')
-    for att in attendances:
-        writer.writerow([
-            att.student.student_id,
-            f"{att.student.first_name} {att.student.last_name}",
-            att.student.email,
-            att.status.capitalize(),
-            att.remarks,
-            att.recorded_at.strftime('%Y-%m-%d %H:%M:%S') if att.recorded_at else ''
-        ])
+    """Generate a streaming CSV export of attendance for a session."""
+    from .exports import stream_session_csv
     
-    return response
+    return stream_session_csv(session)
 
 def get_attendance_statistics(session):
-    """Calculate attendance statistics for a session."""
-    attendances = session.attendances.all()
-    total = attendances.count()
-    
-    if total == 0:
-        return {
-            'total': 0,
-            'present': 0,
-            'absent': 0,
-            'late': 0,
-            'excused': 0,
-            'present_pct': 0,
-            'absent_pct': 0,
-            'late_pct': 0,
-            'excused_pct': 0,
-        }
-    
-    stats = {
-        'total': total,
-        'present': attendances.filter(status='present').count(),
-        'absent': attendances.filter(status='absent').count(),
-        'late': attendances.filter(status='late').count(),
-        'excused': attendances.filter(status='excused').count(),
-    }
-    
-    stats['present_pct'] = round((stats['present'] / total * 100), 1)
-    stats['absent_pct'] = round((stats['absent'] / total * 100), 1)
-    stats['late_pct'] = round((stats['late'] / total * 100), 1)
-    stats['excused_pct'] = round((stats['excused'] / total * 100), 1)
+    """Calculate attendance statistics for a session from its rollup row."""
+    from .models import SessionAttendanceSummary
     
-    return stats
-
-def get_student_absence_count(student):
-    """Get number of absences for a student."""
-    return student.attendances.filter(status='absent').count()
-
+    return summary_statistics(SessionAttendanceSummary.objects.filter(session=session).first())
 
 # Phase 2 Analytics Functions
 
 def get_course_analytics(course):
     """Get comprehensive analytics for a course."""
-    from .models import AttendanceSession, Attendance
-    
-    sessions = course.sessions.all()
-    total_sessions = sessions.count()
+    total_sessions = course.sessions.count()
+    total_students = course.students.count()
     
     if total_sessions == 0:
         return {
             'total_sessions': 0,
             'average_attendance': 0,
-            'total_students': course.students.count(),
+            'total_students': total_students,
             'enrollment_percentage': 0,
         }
     
-    total_attendance_records = Attendance.objects.filter(session__course=course).count()
-    present_count = Attendance.objects.filter(session__course=course, status='present').count()
+    from .models import CourseDailySummary
     
-    attendance_pct = round((present_count / total_attendance_records * 100), 1) if total_attendance_records > 0 else 0
+    stats = rollup_statistics(CourseDailySummary.objects.filter(course=course))
     
     return {
         'total_sessions': total_sessions,
-        'average_attendance': attendance_pct,
-        'total_students': course.students.count(),
-        'enrollment_percentage': course.get_enrollment_percentage(),
+        'average_attendance': stats['attendance_rate'],
+        'total_students': total_students,
+        'enrollment_percentage': percentage(total_students, course.capacity),
     }
 
 
-def get_student_course_analytics(student, course):
-    """Get student's attendance analytics for a specific course."""
-    from .models import AttendanceSession, Attendance
-    
-    sessions = course.sessions.all()
-    total_sessions = sessions.count()
+def get_course_student_analytics(course):
+    """Per-student analytics for every student enrolled in a course.
+
+    Runs three queries however many students and sessions the course has:
+    the session count, the roster and the course's student rollup rows.
+    Returns: list of {'student': Student, 'analytics': dict}
+    """
+    from .models import StudentCourseSummary
     
-    if total_sessions == 0:
-        return {
-            'total_sessions': 0,
-            'present': 0,
-            'absent': 0,
-            'late': 0,
-            'excused': 0,
-            'attendance_rate': 0,
+    total_sessions = course.sessions.count()
+    summaries = {
+        summary.student_id: summary
+        for summary in StudentCourseSummary.objects.filter(course=course)
+    }
+    return [
+        {
+            'student': student,
+            'analytics': _student_course_analytics(summary_statistics(summaries.get(student.id)), total_sessions),
         }
-    
-    attendances = Attendance.objects.filter(session__course=course, student=student)
-    
+        for student in course.students.all()
+    ]
+
+
+def _student_course_analytics(stats, total_sessions):
     return {
         'total_sessions': total_sessions,
-        'present': attendances.filter(status='present').count(),
-        'absent': attendances.filter(status='absent').count(),
-        'late': attendances.filter(status='late').count(),
-        'excused': attendances.filter(status='excused').count(),
-        'attendance_rate': round((attendances.filter(status='present').count() / total_sessions * 100), 1),
+        'present': stats['present'],
+        'absent': stats['absent'],
+        'late': stats['late'],
+        'excused': stats['excused'],
+        'attendance_rate': stats['attendance_rate'] if total_sessions else 0,
     }
 
 
 def get_attendance_trends(course, days=30):
-    """Get attendance trends over the last N days."""
-    from .models import AttendanceSession, Attendance
-    
+    """Get attendance trends over the last N days (one query via the session rollups)."""
     cutoff_date = timezone.now().date() - timedelta(days=days)
-    sessions = course.sessions.filter(date__gte=cutoff_date).order_by('date')
+    sessions = course.sessions.filter(date__gte=cutoff_date).select_related('summary').order_by('date')
     
-    trends = []
-    for session in sessions:
-        stats = get_attendance_statistics(session)
-        trends.append({
+    return [
+        {
             'date': session.date,
             'session': session,
-            'stats': stats,
-        })
-    
-    return trends
+            'stats': summary_statistics(getattr(session, 'summary', None)),
+        }
+        for session in sessions
+    ]
 
 
 def import_students_from_csv(file_content, course):
     """Import students from CSV file to a course.
     
-    Expected CSV columns: student_id, first_name, last_name, email, (optional) phone, department, major
+    Expected CSV columns: student_id, first_name, last_name, email, (optional) phone, department, major,
+    date_of_birth (YYYY-MM-DD, required for students that do not exist yet)
+    Accepts raw bytes or an uploaded file, which is parsed as a stream.
     Returns: (successful_count, error_list)
     """
-    from .models import Student
+    from .imports import import_students
     
-    csv_file = io.StringIO(file_content.decode('utf-8'))
-    reader = csv.DictReader(csv_file)
-    
-    successful = 0
-    errors = []
-    
-    for idx, row in enumerate(reader, 1):
-        try:
-            student_id = row.get('student_id', '').strip()
-            first_name = row.get('first_name', '').strip()
-            last_name = row.get('last_name', '').strip()
-            email = row.get('email', '').strip()
-            
-            if not all([student_id, first_name, last_name, email]):
-                errors.append(f"Row {idx}: Missing required fields")
-                continue
-            
-            # Get or create student
-            student, created = Student.objects.get_or_create(
-                student_id=student_id,
-                defaults={
-                    'first_name': first_name,
-                    'last_name': last_name,
-                    'email': email,
-                    'phone': row.get('phone', ''),
-                    'department': row.get('department', ''),
-                    'major': row.get('major', ''),
-                }
-            )
-            
-            # Add to course if not already enrolled
-            if not course.students.filter(id=student.id).exists():
-                course.students.add(student)
-            
-            successful += 1
-        except Exception as e:
-            errors.append(f"Row {idx}: {str(e)}")
-    
-    return successful, errors
+    return import_students(file_content, course)
 
 
 # Phase 3: Detailed Reports
 
-def generate_attendance_report(filters=None):
-    """Generate detailed attendance report with optional filtering.
-    
-    Parameters:
-    - filters (dict): Optional filters
-      - course_id: Filter by course
-      - student_id: Filter by student
-      - date_from: Start date (YYYY-MM-DD)
-      - date_to: End date (YYYY-MM-DD)
-      - status: Filter by status (present, absent, late, excused)
-    
-    Returns: List of dicts with attendance details
-    """
-    from .models import Attendance
-    
-    query = Attendance.objects.select_related('student', 'session', 'session__course')
-    
+def filter_attendance(query, filters=None):
+    """Apply the detailed report filters (see generate_attendance_report) to an Attendance queryset."""
     if filters:
         if filters.get('course_id'):
             query = query.filter(session__course_id=filters['course_id'])
@@ -220,24 +121,61 @@ def generate_attendance_report(filters=None):
             query = query.filter(session__date__lte=filters['date_to'])
         if filters.get('status'):
             query = query.filter(status=filters['status'])
+    return query
+
+
+# Report rows are ordered by this key; 'id' makes it unique for keyset pagination
+REPORT_ORDERING = ('session__date', 'student__last_name', 'id')
+
+REPORT_FIELDS = (
+    'id', 'student__student_id', 'student__first_name', 'student__last_name', 'student__email',
+    'session__course__code', 'session__course__name', 'session__date',
+    'session__start_time', 'session__end_time', 'status', 'remarks', 'checkin_time', 'recorded_at',
+)
+
+
+def attendance_report_queryset(filters=None):
+    """Lazy, ordered values() queryset behind the detailed attendance report."""
+    from .models import Attendance
     
-    report_data = []
-    for att in query.order_by('session__date', 'student__last_name'):
-        report_data.append({
-            'student_id': att.student.student_id,
-            'student_name': f"{att.student.first_name} {att.student.last_name}",
-            'email': att.student.email,
-            'course_code': att.session.course.code,
-            'course_name': att.session.course.name,
-            'session_date': att.session.date,
-            'session_time': f"{att.session.start_time.strftime('%H:%M')} - {att.session.end_time.strftime('%H:%M')}",
-            'status': att.status,
-            'remarks': att.remarks,
-            'checkin_time': att.checkin_time,
-            'recorded_at': att.recorded_at,
-        })
+    return filter_attendance(Attendance.objects.all(), filters).order_by(*REPORT_ORDERING).values(*REPORT_FIELDS)
+
+
+def report_record(row):
+    """Turn a row of attendance_report_queryset into a report record dict."""
+    return {
+        'id': row['id'],
+        'student_id': row['student__student_id'],
+        'student_name': f"{row['student__first_name']} {row['student__last_name']}",
+        'email': row['student__email'],
+        'course_code': row['session__course__code'],
+        'course_name': row['session__course__name'],
+        'session_date': row['session__date'],
+        'session_time': f"{row['session__start_time'].strftime('%H:%M')} - {row['session__end_time'].strftime('%H:%M')}",
+        'status': row['status'],
+        'remarks': row['remarks'],
+        'checkin_time': row['checkin_time'],
+        'recorded_at': row['recorded_at'],
+    }
+
+
+def generate_attendance_report(filters=None):
+    """Generate detailed attendance report with optional filtering.
     
-    return report_data
+    Parameters:
+    - filters (dict): Optional filters
+      - course_id: Filter by course
+      - student_id: Filter by student
+      - date_from: Start date (YYYY-MM-DD)
+      - date_to: End date (YYYY-MM-DD)
+      - status: Filter by status (present, absent, late, excused)
+    
+    Returns: Lazy iterator of dicts with attendance details, fetched from
+    the database in chunks. Use attendance_report_queryset with
+    KeysetPaginator to display a single page.
+    """
+    rows = attendance_report_queryset(filters).iterator(chunk_size=2000)
+    return (report_record(row) for row in rows)
 
 
 def generate_student_attendance_report(student):
@@ -280,18 +218,27 @@ def generate_student_attendance_report(student):
     
     # Calculate rates
     for course_data in courses_data.values():
-        total = course_data['total_sessions']
-        if total > 0:
-            course_data['attendance_rate'] = round(((course_data['present'] + course_data['late']) / total * 100), 1)
+        course_data['attendance_rate'] = attendance_rate(
+            dict(course_data, total=course_data['total_sessions'])
+        )
+    
+    totals = {
+        'total': sum(c['total_sessions'] for c in courses_data.values()),
+        'present': sum(c['present'] for c in courses_data.values()),
+        'absent': sum(c['absent'] for c in courses_data.values()),
+        'late': sum(c['late'] for c in courses_data.values()),
+        'excused': sum(c['excused'] for c in courses_data.values()),
+    }
     
     return {
         'student': student,
         'courses': courses_data,
-        'total_sessions': sum(c['total_sessions'] for c in courses_data.values()),
-        'total_present': sum(c['present'] for c in courses_data.values()),
-        'total_absent': sum(c['absent'] for c in courses_data.values()),
-        'total_late': sum(c['late'] for c in courses_data.values()),
-        'total_excused': sum(c['excused'] for c in courses_data.values()),
+        'total_sessions': totals['total'],
+        'total_present': totals['present'],
+        'total_absent': totals['absent'],
+        'total_late': totals['late'],
+        'total_excused': totals['excused'],
+        'attendance_rate': attendance_rate(totals),
     }
 
 
@@ -308,6 +255,13 @@ def generate_course_attendance_report(course, date_from=None, date_to=None):
     report_data = []
     students_summary = {}
     
+    # One query for the rows of every session rather than one per session
+    rows_by_session = {}
+    for att in (
+        Attendance.objects.filter(session__in=sessions).select_related('student').order_by('student__last_name')
+    ):
+        rows_by_session.setdefault(att.session_id, []).append(att)
+    
     for session in sessions.order_by('date'):
         session_stats = {
             'date': session.date,
@@ -321,8 +275,7 @@ def generate_course_attendance_report(course, date_from=None, date_to=None):
             'students': [],
         }
         
-        attendances = session.attendances.select_related('student').order_by('student__last_name')
-        for att in attendances:
+        for att in rows_by_session.get(session.id, []):
             student_key = att.student.id
             if student_key not in students_summary:
                 students_summary[student_key] = {
@@ -357,18 +310,15 @@ def generate_course_attendance_report(course, date_from=None, date_to=None):
                 session_stats['excused'] += 1
                 students_summary[student_key]['excused'] += 1
         
-        if session_stats['total_students'] > 0:
-            session_stats['attendance_rate'] = round(
-                ((session_stats['present'] + session_stats['late']) / session_stats['total_students'] * 100), 1
-            )
+        session_stats['attendance_rate'] = attendance_rate(
+            dict(session_stats, total=session_stats['total_students'])
+        )
         
         report_data.append(session_stats)
     
     # Calculate student summary rates
     for summary in students_summary.values():
-        total = summary['total']
-        if total > 0:
-            summary['attendance_rate'] = round(((summary['present'] + summary['late']) / total * 100), 1)
+        summary['attendance_rate'] = attendance_rate(summary)
     
     return {
         'course': course,
@@ -389,6 +339,9 @@ def export_report_to_csv(report_data, report_type='general'):
     - report_type: 'general', 'student', or 'course'
     
     Returns: HttpResponse with CSV data
+    
+    The whole file is built in memory; views use attendance.exports to
+    stream the same columns instead.
     """
     response = HttpResponse(content_type='text/csv')
     filename = f'attendance_report_{timezone.now().strftime("%Y%m%d_%H%M%S")}.csv'
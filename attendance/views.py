@@ -1,73 +1,93 @@
 
+from asgiref.sync import sync_to_async
 from django import forms
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q, Count, F, Avg
+from django.db.models import Q, Count, F, Avg, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
-from datetime import timedelta
+from django.http import JsonResponse, HttpResponse, Http404, FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from django.views.decorators.http import require_POST
+from datetime import date, timedelta
 import csv
-from .models import Student, Course, AttendanceSession, Attendance, UserProfile, RecurringSession, StudentImportLog
+import json
+import os
+from .models import (
+    Student, Course, AttendanceSession, Attendance, UserProfile, RecurringSession, StudentImportLog,
+    CourseDailySummary, BackgroundJob, StudentRisk
+)
 from .forms import (
     UserRegistrationForm, CustomLoginForm, ProfileUpdateForm,
     StudentForm, CourseForm, AttendanceSessionForm, RecurringSessionForm, StudentImportForm
 )
 from .utils import (
-    export_attendance_csv, get_attendance_statistics, get_student_absence_count,
-    get_course_analytics, get_student_course_analytics, get_attendance_trends, import_students_from_csv,
-    generate_attendance_report, generate_student_attendance_report, generate_course_attendance_report,
-    export_report_to_csv, export_report_to_pdf
+    export_attendance_csv, get_attendance_statistics,
+    get_course_analytics, get_course_student_analytics, get_attendance_trends,
+    generate_student_attendance_report, generate_course_attendance_report,
+    attendance_report_queryset, report_record, REPORT_ORDERING
+)
+from .exports import stream_report_csv
+from .pagination import KeysetPaginator, cached_count, estimated_count
+from .jobs import enqueue_job
+from .bulk import apply_session_attendance, entries_from_post, get_session_roster
+from .checkin import (
+    record_checkin, CHECKIN_RECORDED, CHECKIN_DUPLICATE, CHECKIN_NOT_FOUND, CHECKIN_NOT_ENROLLED,
+    CHECKIN_CLOSED, CHECKIN_MESSAGES, CHECKIN_HTTP_STATUS
 )
+from .session_cache import get_session_context, is_checkin_open
+from .statistics import rollup_statistics, summary_statistics
+from . import page_cache
+from .async_db import run_queries
+from .db_router import use_replica
+from .risk import is_at_risk, students_at_risk
+from .timetable import todays_schedule, session_feed
+from .recurrence import lazy_occurrences, materialize_occurrence, materialize_sessions
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
 def manual_attendance(request, session_id):
-    session = get_object_or_404(AttendanceSession, id=session_id)
-    students = session.course.students.all()
-    # Prepare attendance info for each student
-    for student in students:
-        attendance = Attendance.objects.filter(session=session, student=student).first()
-        student.attendance_status = attendance.status if attendance else 'absent'
-        student.attendance_remarks = attendance.remarks if attendance else ''
+    session = get_object_or_404(AttendanceSession.objects.select_related('course'), id=session_id)
     if request.method == 'POST':
-        for student in students:
-            status = request.POST.get(f'status_{student.id}', 'absent')
-            remarks = request.POST.get(f'remarks_{student.id}', '')
-            Attendance.objects.update_or_create(
-                session=session,
-                student=student,
-                defaults={'status': status, 'remarks': remarks}
-            )
+        enrolled_ids = set(session.course.students.values_list('id', flat=True))
+        entries = entries_from_post(request.POST, enrolled_ids, default_status='absent')
+        apply_session_attendance(session, entries, enrolled_ids)
         messages.success(request, 'Attendance updated successfully!')
         return redirect('session_detail', session_id=session.id)
+    # Prepare attendance info for each student
+    students = get_session_roster(session)
     context = {'session': session, 'students': students}
     return render(request, 'attendance/manual_attendance.html', context)
 
 @login_required
-def my_sessions(request):
-    if not hasattr(request.user, 'student'):
+async def my_sessions(request):
+    request.user = user = await request.auser()
+    student = await Student.objects.filter(user=user).afirst()
+    if student is None:
         messages.error(request, 'Only students can access this page.')
         return redirect('dashboard')
-    student = request.user.student
-    now = timezone.now()
-    sessions = AttendanceSession.objects.filter(
-        course__in=student.courses.all(),
-        date=now.date(),
-    ).order_by('start_time')
-    session_list = []
-    for session in sessions:
-        start_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.start_time))
-        end_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.end_time))
-        is_open = start_dt <= now <= end_dt
-        checked_in = Attendance.objects.filter(session=session, student=student, status='present').exists()
-        session.is_open = is_open
-        session.checked_in = checked_in
-        session_list.append(session)
-    context = {'sessions': session_list}
-    return render(request, 'attendance/my_sessions.html', context)
+    user.student = student
+    sessions = await sync_to_async(todays_schedule)(student)
+    context = {'sessions': sessions}
+    return await sync_to_async(render)(request, 'attendance/my_sessions.html', context)
+
+@login_required
+async def my_sessions_feed(request):
+    """JSON of my_sessions for mobile polling; answers 304 while it is unchanged (ETag)."""
+    user = await request.auser()
+    student = await Student.objects.filter(user=user).afirst()
+    if student is None:
+        return JsonResponse({'error': 'Only students have sessions.'}, status=403)
+    sessions = await sync_to_async(todays_schedule)(student)
+    response = JsonResponse({'date': timezone.localdate().isoformat(), 'sessions': session_feed(sessions)})
+    patch_cache_control(response, private=True, no_cache=True)
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
 from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
@@ -226,14 +246,12 @@ def profile_view(request):
     student_data = None
     if hasattr(request.user, 'student'):
         student = request.user.student
-        total_attendances = student.attendances.count()
-        present_count = student.attendances.filter(status='present').count()
-        attendance_rate = round((present_count / total_attendances * 100), 1) if total_attendances > 0 else 0
+        stats = rollup_statistics(student.course_summaries.all())
         
         student_data = {
             'student': student,
-            'total_attendances': total_attendances,
-            'attendance_rate': attendance_rate,
+            'total_attendances': stats['total'],
+            'attendance_rate': stats['attendance_rate'],
         }
     
     context = {
@@ -243,43 +261,84 @@ def profile_view(request):
     }
     return render(request, 'attendance/auth/profile.html', context)
 
+# Rows of the at-risk students widget on the admin and instructor dashboards
+DASHBOARD_RISK_ROWS = 10
+
+
+async def _risk_rows(risks):
+    [rows] = await run_queries(lambda: list(risks[:DASHBOARD_RISK_ROWS]))
+    return rows
+
+
 @login_required
-def dashboard(request):
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
-    
-    if profile.role == 'student' and hasattr(request.user, 'student'):
-        student = request.user.student
-        courses = student.courses.all()
-        recent_attendances = student.attendances.all()[:5]
-        
-        context = {
-            'role': 'student',
-            'courses': courses,
-            'recent_attendances': recent_attendances,
-            'student_profile': student,
-        }
+async def dashboard(request):
+    request.user = user = await request.auser()
+
+    async def load_user():
+        return await run_queries(
+            lambda: UserProfile.objects.get_or_create(user=user)[0],
+            lambda: Student.objects.filter(user=user).first(),
+        )
+
+    # Cached per user until a profile or student row is written
+    profile, student = await page_cache.acached('dashboard-user', ('profile', 'student'), load_user, vary=[user.id])
+    # Cache both on the user for the templates
+    user.profile = profile
+    if student is not None:
+        user.student = student
+
+    if profile.role == 'student' and student is not None:
+        async def build():
+            courses, recent_attendances = await run_queries(
+                lambda: list(student.courses.select_related('instructor')),
+                lambda: list(student.attendances.select_related('session__course')[:5]),
+            )
+            return {'courses': courses, 'recent_attendances': recent_attendances}
+
+        context = await page_cache.acached(
+            'dashboard-student', ('attendance', 'session', 'course'), build, vary=[student.id],
+        )
+        context = {'role': 'student', 'student_profile': student, **context}
     elif profile.role == 'instructor':
-        courses = Course.objects.filter(instructor=request.user)
-        recent_sessions = AttendanceSession.objects.filter(course__instructor=request.user)[:5]
-        
-        context = {
-            'role': 'instructor',
-            'courses': courses,
-            'recent_sessions': recent_sessions,
-        }
+        async def build():
+            courses, recent_sessions = await run_queries(
+                lambda: list(
+                    Course.objects.filter(instructor=user).annotate(student_count=Count('students')).order_by('code')
+                ),
+                lambda: list(AttendanceSession.objects.filter(course__instructor=user).select_related('course')[:5]),
+            )
+            return {'courses': courses, 'recent_sessions': recent_sessions}
+
+        context = await page_cache.acached(
+            'dashboard-instructor', ('session', 'course', 'student'), build, vary=[user.id],
+        )
+        context = {'role': 'instructor', **context}
+        context['at_risk'] = await page_cache.acached(
+            'dashboard-risk-instructor', ('attendance', 'student', 'course'),
+            lambda: _risk_rows(students_at_risk().filter(course__instructor=user)), vary=[user.id],
+        )
     else:
-        total_students = Student.objects.count()
-        total_courses = Course.objects.count()
-        today_sessions = AttendanceSession.objects.filter(date=timezone.now().date()).count()
-        
-        context = {
-            'role': 'admin',
-            'total_students': total_students,
-            'total_courses': total_courses,
-            'today_sessions': today_sessions,
-        }
-    
-    return render(request, 'attendance/dashboard.html', context)
+        today = timezone.now().date()
+
+        async def build():
+            total_students, total_courses, today_sessions = await run_queries(
+                Student.objects.count,
+                Course.objects.count,
+                AttendanceSession.objects.filter(date=today).count,
+            )
+            return {
+                'total_students': total_students,
+                'total_courses': total_courses,
+                'today_sessions': today_sessions,
+            }
+
+        context = await page_cache.acached('dashboard-admin', ('student', 'course', 'session'), build, vary=[today])
+        context = {'role': 'admin', **context}
+        context['at_risk'] = await page_cache.acached(
+            'dashboard-risk-admin', ('attendance', 'student', 'course'), lambda: _risk_rows(students_at_risk()),
+        )
+
+    return await sync_to_async(render)(request, 'attendance/dashboard.html', context)
 
 @login_required
 def student_list(request):
@@ -303,42 +362,31 @@ def student_list(request):
 @login_required
 def student_detail(request, student_id):
     student = get_object_or_404(Student, id=student_id)
-    attendances = student.attendances.all()[:20]
-    
-    total_attendances = student.attendances.count()
-    present_count = student.attendances.filter(status='present').count()
-    attendance_rate = round((present_count / total_attendances * 100), 1) if total_attendances > 0 else 0
+    attendances = student.attendances.select_related('session__course')[:20]
+    stats = rollup_statistics(student.course_summaries.all())
     
     context = {
         'student': student,
         'attendances': attendances,
-        'attendance_rate': attendance_rate,
+        'attendance_rate': stats['attendance_rate'],
     }
     return render(request, 'attendance/student_detail.html', context)
 
 @login_required
 def mark_attendance(request, session_id):
-    session = get_object_or_404(AttendanceSession, id=session_id)
-    students = session.course.students.all()
+    session = get_object_or_404(AttendanceSession.objects.select_related('course'), id=session_id)
     
     if request.method == 'POST':
-        updated = False
-        for student in students:
-            status = request.POST.get(f'status_{student.id}', None)
-            remarks = request.POST.get(f'remarks_{student.id}', '')
-            if status:
-                Attendance.objects.update_or_create(
-                    session=session,
-                    student=student,
-                    defaults={'status': status, 'remarks': remarks}
-                )
-                updated = True
-        if updated:
+        enrolled_ids = set(session.course.students.values_list('id', flat=True))
+        entries = entries_from_post(request.POST, enrolled_ids)
+        saved, _ = apply_session_attendance(session, entries, enrolled_ids)
+        if saved:
             messages.success(request, 'Attendance marked successfully!')
         else:
             messages.warning(request, 'No attendance was updated. Please select a status.')
         return redirect('session_detail', session_id=session.id)
     
+    students = session.course.students.all()
     context = {
         'session': session,
         'students': students,
@@ -347,100 +395,117 @@ def mark_attendance(request, session_id):
 
 
 @login_required
-def student_checkin(request, session_id):
-    session = get_object_or_404(AttendanceSession, id=session_id)
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@require_POST
+def attendance_batch(request, session_id):
+    """Apply a batch of attendance updates posted as JSON.
 
-    # Ensure the user is a student and is enrolled in the course
+    Expected body: {"records": [{"student_id": 1, "status": "present", "remarks": ""}, ...]}
+    """
+    session = get_object_or_404(AttendanceSession.objects.select_related('course'), id=session_id)
+    try:
+        payload = json.loads(request.body or b'{}')
+        records = payload['records']
+        entries = [
+            (record.get('student_id'), record.get('status'), record.get('remarks', ''))
+            for record in records
+        ]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected a JSON object with a "records" list.'}, status=400)
+    
+    saved, skipped = apply_session_attendance(session, entries)
+    return JsonResponse({'saved': saved, 'skipped': skipped})
+
+@login_required
+def student_checkin(request, session_id):
+    # Ensure the user is a student before touching the session
     if not hasattr(request.user, 'student'):
         messages.error(request, 'Only students can check in.')
-        return redirect('session_detail', session_id=session.id)
+        return redirect('session_detail', session_id=session_id)
 
-    student = request.user.student
-    if not session.course.students.filter(id=student.id).exists():
-        messages.error(request, 'You are not enrolled in this course.')
-        return redirect('session_detail', session_id=session.id)
+    outcome, status = record_checkin(session_id, request.user.id, request.POST.get('checkin_code'))
+    if outcome == CHECKIN_NOT_FOUND:
+        raise Http404('Session not found.')
+    _checkin_message(request, outcome, status)
+    return redirect('session_detail', session_id=session_id)
+
+
+def _checkin_message(request, outcome, status):
+    if outcome == CHECKIN_RECORDED:
+        if status == 'late':
+            messages.warning(request, 'Checked in — you were marked late.')
+        else:
+            messages.success(request, CHECKIN_MESSAGES[outcome])
+    elif outcome == CHECKIN_DUPLICATE:
+        messages.info(request, CHECKIN_MESSAGES[outcome])
+    else:
+        messages.error(request, CHECKIN_MESSAGES[outcome])
+
+
+@require_POST
+def api_checkin(request, session_id):
+    """JSON check-in endpoint built for bursts of concurrent students.
 
-    # Optional: enforce check-in time window if session has start_time/end_time
-    now = timezone.now()
-    if getattr(session, 'start_time', None) and getattr(session, 'end_time', None):
-        # combine date with times if date fields are present
+    Accepts the code as form data or a JSON body ({"checkin_code": "..."}).
+    Retrying a successful check-in is safe and returns 200.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'result': 'unauthenticated', 'detail': 'Authentication required.'}, status=401)
+
+    code = request.POST.get('checkin_code')
+    if code is None and request.content_type == 'application/json':
         try:
-            start_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.start_time))
-            end_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.end_time))
-        except Exception:
-            start_dt = None
-            end_dt = None
-
-        if start_dt and end_dt and not (start_dt <= now <= end_dt):
-            messages.error(request, 'Check-in is not open at this time.')
-            return redirect('session_detail', session_id=session.id)
-
-    # Record attendance as 'present' for the checking student
-    # If the session requires a check-in code, validate it
-    required_code = getattr(session, 'checkin_code', None)
-    if required_code:
-        entered = request.POST.get('checkin_code', '').strip()
-        if not entered or entered != str(required_code):
-            messages.error(request, 'Invalid or missing check-in code.')
-            return redirect('session_detail', session_id=session.id)
+            code = json.loads(request.body or b'{}').get('checkin_code')
+        except (ValueError, AttributeError):
+            return JsonResponse({'result': 'bad_request', 'detail': 'Malformed JSON body.'}, status=400)
 
-    Attendance.objects.update_or_create(
-        session=session,
-        student=student,
-        defaults={'status': 'present'}
+    outcome, status = record_checkin(session_id, request.user.id, code)
+    return JsonResponse(
+        {'result': outcome, 'status': status, 'detail': CHECKIN_MESSAGES[outcome]},
+        status=CHECKIN_HTTP_STATUS[outcome],
     )
 
-    messages.success(request, 'Checked in — attendance recorded.')
-    return redirect('session_detail', session_id=session.id)
-
 @login_required
-def session_detail(request, session_id):
-    session = get_object_or_404(AttendanceSession, id=session_id)
-    attendances = session.attendances.all()
-    
-    stats = {
-        'present': attendances.filter(status='present').count(),
-        'absent': attendances.filter(status='absent').count(),
-        'late': attendances.filter(status='late').count(),
-        'excused': attendances.filter(status='excused').count(),
-    }
-    
-    total = sum(stats.values())
-    stats['present_percentage'] = round((stats['present'] / total * 100), 1) if total > 0 else 0
+async def session_detail(request, session_id):
+    request.user = user = await request.auser()
+    session, attendances, stats, student = await run_queries(
+        lambda: AttendanceSession.objects.select_related('course').filter(id=session_id).first(),
+        lambda: list(Attendance.objects.filter(session_id=session_id).select_related('student')),
+        lambda: get_attendance_statistics(session_id),
+        lambda: Student.objects.filter(user=user).first(),
+    )
+    if session is None:
+        raise Http404('No AttendanceSession matches the given query.')
     # Determine whether the current user can self check-in
     can_checkin = False
-    student_absences = 0
-    if request.user.is_authenticated and hasattr(request.user, 'student'):
-        student = request.user.student
-        if session.course.students.filter(id=student.id).exists():
-            now = timezone.now()
-            start_dt = None
-            end_dt = None
-            if getattr(session, 'start_time', None) and getattr(session, 'end_time', None):
-                try:
-                    start_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.start_time))
-                    end_dt = timezone.make_aware(timezone.datetime.combine(session.date, session.end_time))
-                except Exception:
-                    start_dt = None
-                    end_dt = None
-
-            if (start_dt and end_dt and (start_dt <= now <= end_dt)) or (not start_dt and not end_dt):
-                can_checkin = True
-            
-            # Get student absence count
-            student_absences = get_student_absence_count(student)
+    absence_risk = None
+    if student is not None:
+        user.student = student
+        session_context, absence_risk = await run_queries(
+            lambda: get_session_context(session.id),
+            lambda: StudentRisk.objects.filter(student=student, course_id=session.course_id).first(),
+        )
+        if student.id in session_context['student_ids']:
+            can_checkin = is_checkin_open(session_context)
+        else:
+            absence_risk = None
 
     context = {
         'session': session,
         'attendances': attendances,
         'stats': stats,
         'can_checkin': can_checkin,
-        'student_absences': student_absences,
+        'absence_risk': absence_risk,
+        'absence_alert': absence_risk is not None and is_at_risk(absence_risk),
+        'status_choices': Attendance.STATUS_CHOICES,
+        # Filled in from the link of a rotating-code QR code
+        'prefill_code': request.GET.get('code', ''),
     }
-    return render(request, 'attendance/session_detail.html', context)
+    return await sync_to_async(render)(request, 'attendance/session_detail.html', context)
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@use_replica
 def export_attendance(request, session_id):
     """Export session attendance as CSV."""
     session = get_object_or_404(AttendanceSession, id=session_id)
@@ -456,7 +521,7 @@ def is_admin_or_instructor(user):
 @login_required
 def course_list(request):
     search_query = request.GET.get('search', '')
-    courses = Course.objects.all()
+    courses = Course.objects.annotate(student_count=Count('students')).order_by('code')
     
     if search_query:
         courses = courses.filter(
@@ -517,45 +582,58 @@ def course_edit(request, course_id):
     context = {'form': form, 'title': 'Edit Course', 'course': course}
     return render(request, 'attendance/course_form.html', context)
 
+# Days ahead shown of lazy recurring schedules on the course page
+UPCOMING_OCCURRENCE_DAYS = 14
+
 @login_required
 def course_detail(request, course_id):
-    course = get_object_or_404(Course, id=course_id)
+    session_count = (
+        AttendanceSession.objects.filter(course=OuterRef('pk')).order_by()
+        .values('course').annotate(n=Count('id')).values('n')
+    )
+    course = get_object_or_404(
+        Course.objects.annotate(
+            student_count=Count('students'),
+            session_count=Coalesce(Subquery(session_count), 0),
+        ),
+        id=course_id,
+    )
     students = course.students.all()
-    sessions = course.sessions.all()[:10]
+    sessions = course.sessions.select_related('summary')[:10]
+    today = timezone.localdate()
+    upcoming = lazy_occurrences([course.id], today, today + timedelta(days=UPCOMING_OCCURRENCE_DAYS))[:10]
     
     context = {
         'course': course,
         'students': students,
         'sessions': sessions,
+        'upcoming': upcoming,
         'enrollment_percentage': course.get_enrollment_percentage(),
     }
     return render(request, 'attendance/course_detail.html', context)
 
 @login_required
 @user_passes_test(is_admin_or_instructor)
+@use_replica
 def attendance_report(request):
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     course_id = request.GET.get('course')
     
-    attendances = Attendance.objects.all()
+    attendances = Attendance.objects.select_related('student', 'session__course')
+    daily = CourseDailySummary.objects.all()
     
     if date_from:
         attendances = attendances.filter(session__date__gte=date_from)
+        daily = daily.filter(date__gte=date_from)
     if date_to:
         attendances = attendances.filter(session__date__lte=date_to)
+        daily = daily.filter(date__lte=date_to)
     if course_id:
         attendances = attendances.filter(session__course_id=course_id)
+        daily = daily.filter(course_id=course_id)
     
-    stats = {
-        'total': attendances.count(),
-        'present': attendances.filter(status='present').count(),
-        'absent': attendances.filter(status='absent').count(),
-        'late': attendances.filter(status='late').count(),
-        'excused': attendances.filter(status='excused').count(),
-    }
-    
-    stats['present_percentage'] = round((stats['present'] / stats['total'] * 100), 1) if stats['total'] > 0 else 0
+    stats = rollup_statistics(daily)
     
     courses = Course.objects.all()
     
@@ -570,39 +648,28 @@ def attendance_report(request):
     return render(request, 'attendance/attendance_report.html', context)
 
 @login_required
+@use_replica
 def student_statistics(request, student_id):
     student = get_object_or_404(Student, id=student_id)
-    attendances = student.attendances.all()
     courses = student.courses.all()
     
-    by_status = {
-        'present': attendances.filter(status='present').count(),
-        'absent': attendances.filter(status='absent').count(),
-        'late': attendances.filter(status='late').count(),
-        'excused': attendances.filter(status='excused').count(),
-    }
-    
-    total = attendances.count()
-    attendance_rate = round((by_status['present'] / total * 100), 1) if total > 0 else 0
+    summaries = {summary.course_id: summary for summary in student.course_summaries.all()}
+    by_status = rollup_statistics(student.course_summaries.all())
     
     course_stats = []
     for course in courses:
-        course_attendances = attendances.filter(session__course=course)
-        course_present = course_attendances.filter(status='present').count()
-        course_total = course_attendances.count()
-        course_rate = round((course_present / course_total * 100), 1) if course_total > 0 else 0
-        
+        stats = summary_statistics(summaries.get(course.id))
         course_stats.append({
             'course': course,
-            'total': course_total,
-            'present': course_present,
-            'rate': course_rate,
+            'total': stats['total'],
+            'present': stats['present'],
+            'rate': stats['attendance_rate'],
         })
     
     context = {
         'student': student,
-        'total_sessions': total,
-        'attendance_rate': attendance_rate,
+        'total_sessions': by_status['total'],
+        'attendance_rate': by_status['attendance_rate'],
         'by_status': by_status,
         'course_stats': course_stats,
     }
@@ -610,43 +677,35 @@ def student_statistics(request, student_id):
 
 @login_required
 @user_passes_test(is_admin_or_instructor)
+@use_replica
 def admin_dashboard(request):
     if not is_admin_or_instructor(request.user):
         return redirect('dashboard')
     
-    total_students = Student.objects.count()
-    total_courses = Course.objects.count()
-    total_sessions = AttendanceSession.objects.count()
-    total_attendance_records = Attendance.objects.count()
-    
     today = timezone.now().date()
-    today_sessions = AttendanceSession.objects.filter(date=today)
-    week_ago = today - timedelta(days=7)
-    week_sessions = AttendanceSession.objects.filter(date__gte=week_ago)
-    
-    active_students = Student.objects.filter(status='active').count()
-    avg_attendance = 0
-    if total_attendance_records > 0:
-        present_count = Attendance.objects.filter(status='present').count()
-        avg_attendance = round((present_count / total_attendance_records * 100), 1)
-    
-    recent_sessions = AttendanceSession.objects.all()[:5]
-    top_courses = Course.objects.annotate(
+
+    def counts():
+        overall = rollup_statistics(CourseDailySummary.objects.all())
+        week_ago = today - timedelta(days=7)
+        return {
+            'total_students': Student.objects.count(),
+            'total_courses': Course.objects.count(),
+            'total_sessions': AttendanceSession.objects.count(),
+            'total_attendance_records': overall['total'],
+            'today_sessions': AttendanceSession.objects.filter(date=today).count(),
+            'week_sessions': AttendanceSession.objects.filter(date__gte=week_ago).count(),
+            'active_students': Student.objects.filter(status='active').count(),
+            'avg_attendance': overall['attendance_rate'],
+        }
+
+    context = dict(page_cache.cached(
+        'admin-dashboard', ('attendance', 'session', 'course', 'student'), counts, vary=[today],
+    ))
+    # Evaluated by the template only when its cached fragment is missing
+    context['recent_sessions'] = AttendanceSession.objects.select_related('course', 'summary')[:5]
+    context['top_courses'] = Course.objects.annotate(
         student_count=Count('students')
     ).order_by('-student_count')[:5]
-    
-    context = {
-        'total_students': total_students,
-        'total_courses': total_courses,
-        'total_sessions': total_sessions,
-        'total_attendance_records': total_attendance_records,
-        'today_sessions': today_sessions.count(),
-        'week_sessions': week_sessions.count(),
-        'active_students': active_students,
-        'avg_attendance': avg_attendance,
-        'recent_sessions': recent_sessions,
-        'top_courses': top_courses,
-    }
     return render(request, 'attendance/admin_dashboard.html', context)
 
 
@@ -654,6 +713,7 @@ def admin_dashboard(request):
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@use_replica
 def detailed_attendance_report(request):
     """Detailed attendance report with filtering."""
     filters = {}
@@ -670,29 +730,45 @@ def detailed_attendance_report(request):
     if request.GET.get('status'):
         filters['status'] = request.GET.get('status')
     
-    report_data = generate_attendance_report(filters if filters else None)
+    # CSV is streamed straight from the database without building the report
+    export_format = request.GET.get('export')
+    if export_format == 'csv':
+        return stream_report_csv('general', filters=filters or None)
     
     # Get students for dropdown
     students = Student.objects.all()
     
-    # Export handling
-    export_format = request.GET.get('export')
-    if export_format == 'csv':
-        return export_report_to_csv(report_data, 'general')
-    elif export_format == 'pdf':
-        return export_report_to_pdf(report_data, 'general')
+    # PDFs and background CSVs are rendered by the job worker
+    if export_format in ('pdf', 'csv_job'):
+        return enqueue_report_export(request, 'general', filters=filters or None)
     
-    # Pagination
-    paginator = Paginator(report_data, 50)
-    page = request.GET.get('page')
-    report_page = paginator.get_page(page)
+    # Keyset pagination: each page seeks past the last row of the previous one
+    report_queryset = attendance_report_queryset(filters or None)
+    paginator = KeysetPaginator(report_queryset, REPORT_ORDERING, per_page=50, transform=report_record)
+    report_page = paginator.page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        last='last' in request.GET,
+    )
+    
+    # Unfiltered totals use the planner estimate where available
+    total_records = estimated_count(Attendance) if not filters else None
+    total_is_estimate = total_records is not None
+    if total_records is None:
+        total_records = cached_count(report_queryset, filters)
+    
+    page_query = request.GET.copy()
+    for key in ('after', 'before', 'last', 'page', 'export'):
+        page_query.pop(key, None)
     
     context = {
         'report': report_page,
         'courses': courses,
         'students': students,
         'filters': filters,
-        'total_records': len(report_data),
+        'total_records': total_records,
+        'total_is_estimate': total_is_estimate,
+        'page_query': page_query.urlencode(),
         'status_choices': Attendance.STATUS_CHOICES,
     }
     return render(request, 'attendance/detailed_report.html', context)
@@ -700,20 +776,22 @@ def detailed_attendance_report(request):
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@use_replica
 def course_attendance_report(request, course_id):
     """Detailed attendance report for a specific course."""
     course = get_object_or_404(Course, id=course_id)
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
-    report_data = generate_course_attendance_report(course, date_from, date_to)
-    
-    # Export handling
     export_format = request.GET.get('export')
     if export_format == 'csv':
-        return export_report_to_csv(report_data, 'course')
-    elif export_format == 'pdf':
-        return export_report_to_pdf(report_data, 'course')
+        return stream_report_csv('course', course=course, date_from=date_from, date_to=date_to)
+    if export_format in ('pdf', 'csv_job'):
+        return enqueue_report_export(
+            request, 'course', course_id=course.id, date_from=date_from, date_to=date_to,
+        )
+    
+    report_data = generate_course_attendance_report(course, date_from, date_to)
     
     context = {
         'course': course,
@@ -726,17 +804,18 @@ def course_attendance_report(request, course_id):
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@use_replica
 def student_attendance_report(request, student_id):
     """Detailed attendance report for a specific student."""
     student = get_object_or_404(Student, id=student_id)
-    report_data = generate_student_attendance_report(student)
     
-    # Export handling
     export_format = request.GET.get('export')
     if export_format == 'csv':
-        return export_report_to_csv(report_data, 'student')
-    elif export_format == 'pdf':
-        return export_report_to_pdf(report_data, 'student')
+        return stream_report_csv('student', student=student)
+    if export_format in ('pdf', 'csv_job'):
+        return enqueue_report_export(request, 'student', student_id=student.id)
+    
+    report_data = generate_student_attendance_report(student)
     
     context = {
         'student': student,
@@ -747,19 +826,13 @@ def student_attendance_report(request, student_id):
 
 @login_required
 @user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@use_replica
 def course_analytics(request, course_id):
     """Display analytics for a course."""
     course = get_object_or_404(Course, id=course_id)
     analytics = get_course_analytics(course)
     trends = get_attendance_trends(course, days=30)
-    
-    # Per-student analytics
-    student_analytics = []
-    for student in course.students.all():
-        student_analytics.append({
-            'student': student,
-            'analytics': get_student_course_analytics(student, course)
-        })
+    student_analytics = get_course_student_analytics(course)
     
     context = {
         'course': course,
@@ -781,27 +854,17 @@ def recurring_session_create(request, course_id):
         if form.is_valid():
             recurring_session = form.save(commit=False)
             recurring_session.course = course
+            recurring_session.excluded_dates = sorted(day.isoformat() for day in form.cleaned_data['exclude_dates'])
             recurring_session.save()
             
-            # Generate individual sessions
-            session_dates = recurring_session.generate_sessions()
-            created_count = 0
-            
-            for session_date in session_dates:
-                try:
-                    AttendanceSession.objects.create(
-                        course=course,
-                        date=session_date,
-                        start_time=recurring_session.start_time,
-                        end_time=recurring_session.end_time,
-                        notes=recurring_session.notes,
-                        is_recurring=True,
-                    )
-                    created_count += 1
-                except Exception:
-                    pass
-            
-            messages.success(request, f'Created {created_count} attendance sessions from recurring template.')
+            if recurring_session.lazy:
+                messages.success(request, 'Recurring schedule saved. Each session is created when it is first used.')
+                return redirect('course_detail', course_id=course.id)
+            created_count, skipped_count = materialize_sessions([recurring_session])
+            message = f'Created {created_count} attendance sessions from recurring template.'
+            if skipped_count:
+                message += f' {skipped_count} already scheduled at that time were skipped.'
+            messages.success(request, message)
             return redirect('course_detail', course_id=course.id)
     else:
         form = RecurringSessionForm(initial={'course': course})
@@ -821,26 +884,19 @@ def bulk_import_students(request, course_id):
         if form.is_valid():
             csv_file = request.FILES['csv_file']
             try:
-                file_content = csv_file.read()
-                successful, errors = import_students_from_csv(file_content, course)
-                
-                # Create import log
-                StudentImportLog.objects.create(
+                # The import runs in the job worker; the log tracks its progress
+                import_log = StudentImportLog.objects.create(
                     course=course,
                     uploaded_by=request.user,
                     file_name=csv_file.name,
-                    status='completed',
-                    total_records=successful + len(errors),
-                    successful_imports=successful,
-                    failed_imports=len(errors),
-                    error_details='\n'.join(errors) if errors else '',
+                    status='pending',
+                )
+                job = enqueue_job(
+                    'student_import', created_by=request.user, input_file=csv_file, import_log=import_log,
                 )
                 
-                messages.success(request, f'Successfully imported {successful} student(s).')
-                if errors:
-                    messages.warning(request, f'{len(errors)} record(s) had errors. Check the import log.')
-                
-                return redirect('course_detail', course_id=course.id)
+                messages.info(request, f'Import of {csv_file.name} queued. Results will appear in the import log.')
+                return redirect('job_detail', job_id=job.id)
             except Exception as e:
                 messages.error(request, f'Error processing file: {str(e)}')
     else:
@@ -857,11 +913,250 @@ def bulk_import_students(request, course_id):
 def import_logs(request, course_id):
     """View import logs for a course."""
     course = get_object_or_404(Course, id=course_id)
-    logs = course.import_logs.all().order_by('-created_at')
+    logs = course.import_logs.select_related('uploaded_by').order_by('-created_at')
     
     paginator = Paginator(logs, 20)
     page = request.GET.get('page')
     logs = paginator.get_page(page)
     
     context = {'course': course, 'logs': logs}
-    return render(request, 'attendance/import_logs.html', context)
\ No newline at end of file
+    return render(request, 'attendance/import_logs.html', context)
+
+
+# Background jobs
+
+def enqueue_report_export(request, report_type, **params):
+    """Queue a report export (?export=pdf or ?export=csv_job) and redirect to its status page."""
+    export_format = 'pdf' if request.GET.get('export') == 'pdf' else 'csv'
+    job = enqueue_job(
+        'report_export',
+        created_by=request.user,
+        params=dict(params, report_type=report_type, format=export_format),
+    )
+    messages.info(request, f'{export_format.upper()} export queued. The download link appears here when it is ready.')
+    return redirect('job_detail', job_id=job.id)
+
+
+def _get_job_for(request, job_id):
+    job = get_object_or_404(BackgroundJob.objects.select_related('import_log__course'), id=job_id)
+    if job.created_by_id != request.user.id and not (
+        request.user.is_superuser or (hasattr(request.user, 'profile') and request.user.profile.role == 'admin')
+    ):
+        raise Http404('Job not found')
+    return job
+
+
+def _job_payload(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'processed_items': job.processed_items,
+        'message': job.message,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+        'created_at': job.created_at.isoformat(),
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+        'download_url': reverse('job_download', args=[job.id]) if job.result_file else None,
+    }
+
+
+@login_required
+def job_detail(request, job_id):
+    """Status page for a background job; polls job_status until it finishes."""
+    job = _get_job_for(request, job_id)
+    context = {'job': job, 'payload': _job_payload(job)}
+    return render(request, 'attendance/job_detail.html', context)
+
+
+@login_required
+def job_status(request, job_id):
+    """JSON polling endpoint for a background job."""
+    return JsonResponse(_job_payload(_get_job_for(request, job_id)))
+
+
+@login_required
+def job_download(request, job_id):
+    """Download the file produced by a finished export job."""
+    job = _get_job_for(request, job_id)
+    if not job.result_file:
+        raise Http404('This job has no result file')
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=os.path.basename(job.result_file.name))
+
+
+# Request profiler
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def request_profiler(request):
+    """Per-URL latency and query profile from the request profiler."""
+    from . import profiling
+
+    source = 'log' if request.GET.get('source') == 'log' and settings.REQUEST_PROFILER_LOG else 'buffer'
+    records = profiling.read_log() if source == 'log' else list(profiling.RECORDS)
+
+    context = {
+        'enabled': settings.REQUEST_PROFILER,
+        'has_log': bool(settings.REQUEST_PROFILER_LOG),
+        'source': source,
+        'record_count': len(records),
+        'rows': profiling.summarize(records),
+        'recent': records[-20:][::-1],
+        'pools': profiling.pool_stats(),
+    }
+    return render(request, 'attendance/request_profiler.html', context)
+
+
+@login_required
+@user_passes_test(lambda u: u.is_staff)
+def page_cache_stats(request):
+    """Hit/miss counts of the cached dashboard parts in this process, and the table versions."""
+    response = JsonResponse({
+        'timeout': settings.PAGE_CACHE_TIMEOUT,
+        'versions': page_cache.current_versions(),
+        'parts': page_cache.stats(),
+    })
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+# Live attendance board
+
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+async def session_events(request, session_id):
+    """Server-sent events stream of check-ins and status changes for a session.
+
+    Needs an ASGI server (uvicorn, daphne). Under WSGI a stream would hold a
+    worker for its whole life, so the endpoint answers 204 and the page
+    polls session_live instead.
+    """
+    from django.core.handlers.asgi import ASGIRequest
+    from .live import event_stream
+
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    if not await AttendanceSession.objects.filter(id=session_id).aexists():
+        raise Http404('Session not found.')
+
+    response = StreamingHttpResponse(event_stream(session_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+def session_live(request, session_id):
+    """JSON snapshot of a session's board (counts and attendance rows) for polling."""
+    from .live import session_snapshot
+
+    get_object_or_404(AttendanceSession.objects.only('id'), id=session_id)
+    return JsonResponse(session_snapshot(session_id))
+
+
+# Rotating check-in codes
+
+def _rotating_code_context(session_id):
+    context = get_session_context(session_id)
+    if context is None or not context['rotating_code']:
+        raise Http404('Session has no rotating check-in code.')
+    return context
+
+
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+def session_code(request, session_id):
+    """Current rotating check-in code of a session, for the projector page to poll."""
+    from .rotating_codes import current_code
+
+    _rotating_code_context(session_id)
+    code, step, expires_in = current_code(session_id)
+    response = JsonResponse({
+        'code': code,
+        'step': step,
+        'expires_in': round(expires_in, 3),
+        'qr': f'{reverse("session_code_qr", args=[session_id])}?step={step}',
+    })
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+def session_code_qr(request, session_id):
+    """SVG QR code linking to the session page with the current code filled in."""
+    from .rotating_codes import current_code, qr_svg
+
+    _rotating_code_context(session_id)
+    code, step, expires_in = current_code(session_id)
+    url = request.build_absolute_uri(f'{reverse("session_detail", args=[session_id])}?code={code}')
+    response = HttpResponse(qr_svg(session_id, step, url), content_type='image/svg+xml')
+    patch_cache_control(response, private=True, max_age=int(expires_in))
+    return response
+
+
+# Lazy recurring sessions: a session row is created on its first use
+
+def _occurrence(template_id, day):
+    """Template and date of an occurrence URL (404 for a bad date)."""
+    template = get_object_or_404(RecurringSession.objects.select_related('course'), id=template_id)
+    try:
+        return template, date.fromisoformat(day)
+    except ValueError:
+        raise Http404('Invalid date.')
+
+
+@login_required
+@require_POST
+def occurrence_checkin(request, template_id, day):
+    """Check in to a session of a lazy template that has no row yet, creating it."""
+    if not hasattr(request.user, 'student'):
+        messages.error(request, 'Only students can check in.')
+        return redirect('my_sessions')
+    template, day = _occurrence(template_id, day)
+    # Refuse before creating anything, so failed attempts leave no empty sessions
+    now = timezone.localtime()
+    if not template.course.students.filter(id=request.user.student.id).exists():
+        messages.error(request, CHECKIN_MESSAGES[CHECKIN_NOT_ENROLLED])
+        return redirect('my_sessions')
+    if day != now.date() or not template.start_time <= now.time() <= template.end_time:
+        messages.error(request, CHECKIN_MESSAGES[CHECKIN_CLOSED])
+        return redirect('my_sessions')
+
+    session = materialize_occurrence(template, day)
+    if session is None:
+        raise Http404('No session on this date.')
+    outcome, status = record_checkin(session.id, request.user.id, request.POST.get('checkin_code'))
+    _checkin_message(request, outcome, status)
+    return redirect('session_detail', session_id=session.id)
+
+
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'profile') and u.profile.role in ['instructor', 'admin'])
+@require_POST
+def occurrence_open(request, template_id, day):
+    """Create the session of a lazy template on a date (if needed) and go to it for marking."""
+    template, day = _occurrence(template_id, day)
+    session = materialize_occurrence(template, day)
+    if session is None:
+        raise Http404('No session on this date.')
+    return redirect('session_detail', session_id=session.id)
+
+
+# Health checks for load balancers and orchestrators (no login)
+
+def health_live(request):
+    """Liveness: the process serves requests. Touches nothing else."""
+    response = JsonResponse({'status': 'live'})
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def health_ready(request):
+    """Readiness: the database answers and every migration is applied (503 otherwise)."""
+    from .preflight import readiness
+
+    ready, checks = readiness()
+    response = JsonResponse({'status': 'ready' if ready else 'unavailable', 'checks': checks}, status=200 if ready else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
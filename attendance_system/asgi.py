@@ -3,6 +3,10 @@ ASGI config for attendance_system project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live attendance board (server-sent events) needs this entry point, e.g.
+``uvicorn attendance_system.asgi:application``; under WSGI the board falls
+back to polling. run.sh serves it with SERVER_INTERFACE=asgi.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
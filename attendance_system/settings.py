@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -50,7 +51,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'attendance.profiling.RequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'attendance.db_router.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -103,6 +106,137 @@ else:
         }
     }
 
+# Read replica: report, analytics and export views read from it
+# (attendance.db_router.use_replica); writes and every other view use the
+# primary. A user who wrote reads from the primary for REPLICA_STICKY_SECONDS
+# afterwards, so they see their own changes while the replica catches up.
+# Locally, point it at a copy of the SQLite file
+# (REPLICA_DATABASE_URL=sqlite:////path/to/replica.sqlite3) or a second
+# PostgreSQL database restored from the primary.
+REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        REPLICA_DATABASE_URL,
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    # Tests run against one database; the replica alias reuses it
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['attendance.db_router.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
+# SQLite: take the write lock when a transaction starts so concurrent writers
+# (job worker threads, parallel requests) wait for it instead of failing with
+# "database is locked" when a read transaction tries to upgrade.
+for database in DATABASES.values():
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        database.setdefault('OPTIONS', {}).setdefault('transaction_mode', 'IMMEDIATE')
+        database['OPTIONS'].setdefault('timeout', 20)
+
+# PostgreSQL connection pool (psycopg 3, `psycopg[pool]`). CONN_MAX_AGE keeps
+# one connection per thread, so workers x threads connections stay open.
+# DB_POOL=True gives each process one pool shared by its threads instead:
+# requests borrow a connection for their duration and wait up to
+# DB_POOL_TIMEOUT seconds when all DB_POOL_MAX_SIZE are in use. Size it to
+# at least the gunicorn threads per worker (GUNICORN_THREADS in run.sh);
+# the database then sees at most workers x DB_POOL_MAX_SIZE connections.
+# Pool usage is shown on the request profiler page.
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_OPTIONS = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    # Close connections idle this long (seconds), down to min_size
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+}
+if DB_POOL:
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.postgresql':
+            # Pooled connections are returned, not kept: Django requires
+            # CONN_MAX_AGE=0. CONN_HEALTH_CHECKS (kept on) makes the pool
+            # check a connection before lending it.
+            database['CONN_MAX_AGE'] = 0
+            database.setdefault('OPTIONS', {})['pool'] = dict(DB_POOL_OPTIONS)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; use 'file' or 'database' (after
+# `python manage.py createcachetable`) so several gunicorn workers share
+# cached session contexts. A dotted backend path is also accepted.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'database': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'attendance',
+    'file': os.path.join(tempfile.gettempdir(), 'attendance_cache'),
+    'database': 'attendance_cache',
+}
+
+cache_backend = os.getenv('CACHE_BACKEND', 'locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(cache_backend, cache_backend),
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_DEFAULT_LOCATIONS.get(cache_backend, '')),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', '300')),
+        # locmem/file/database backends cull entries past this count
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000'))},
+    }
+}
+
+# Dashboard contexts and template fragments are cached under keys carrying
+# the last-write versions of the data they show (attendance.page_cache), so
+# writes expire them at once; the TTL (seconds) only bounds stale entries'
+# lifetime in the cache.
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '600'))
+
+# Background jobs (imports and report exports) are queued in the database and
+# run by `python manage.py run_jobs`. The worker reads uploads from and writes
+# results to MEDIA_ROOT, so it must share that storage with the web process.
+# The worker also applies queued check-ins to the attendance rollups every
+# poll interval. JOB_QUEUE_INLINE=True runs jobs, and applies check-ins,
+# inside the request instead (development).
+JOB_QUEUE_INLINE = os.getenv('JOB_QUEUE_INLINE', 'False') == 'True'
+
+# Rotating check-in codes (sessions with rotating_code set): the code changes
+# every CHECKIN_CODE_STEP seconds and is derived from the session id and
+# SECRET_KEY, so codes are never stored. A code is still accepted
+# CHECKIN_CODE_DRIFT steps either side of its own, covering typing time and
+# clock skew between servers.
+CHECKIN_CODE_STEP = int(os.getenv('CHECKIN_CODE_STEP', '30'))
+CHECKIN_CODE_DRIFT = int(os.getenv('CHECKIN_CODE_DRIFT', '1'))
+
+# Async views (dashboard, my_sessions, session_detail) run their independent
+# queries at the same time on this many pooled threads, each holding its own
+# database connection, so a page waits for its slowest query rather than the
+# sum of them. Serve attendance_system.asgi (SERVER_INTERFACE=asgi in run.sh)
+# to keep the event loop between requests; under WSGI each request of such a
+# view still gains from the overlap.
+ASYNC_QUERY_WORKERS = int(os.getenv('ASYNC_QUERY_WORKERS', '8'))
+
+# Chronic absence risk index (attendance.risk). Each enrolled student x
+# course keeps its absence rate and absence/late streaks over the course's
+# last RISK_WINDOW_SESSIONS sessions with attendance taken (no record counts
+# as absent), updated on every attendance write. Students at or above RISK_ABSENCE_RATE percent with at least
+# RISK_MIN_SESSIONS sessions in the window are flagged on the dashboards.
+# Changing the window needs `python manage.py rebuild_risk`, which also runs
+# nightly to recompute the index from scratch.
+RISK_WINDOW_SESSIONS = int(os.getenv('RISK_WINDOW_SESSIONS', '10'))
+RISK_ABSENCE_RATE = float(os.getenv('RISK_ABSENCE_RATE', '30'))
+RISK_MIN_SESSIONS = int(os.getenv('RISK_MIN_SESSIONS', '3'))
+
+# Request profiler (opt-in): time, SQL and template cost of every request,
+# kept in a per-process ring buffer and shown to staff at /profiler/.
+# REQUEST_PROFILER_LOG also appends each record to a JSONL file, rotated
+# to <file>.1 once it reaches REQUEST_PROFILER_LOG_MAX_BYTES.
+REQUEST_PROFILER = os.getenv('REQUEST_PROFILER', 'False') == 'True'
+REQUEST_PROFILER_BUFFER = int(os.getenv('REQUEST_PROFILER_BUFFER', '2000'))
+REQUEST_PROFILER_LOG = os.getenv('REQUEST_PROFILER_LOG', '')
+REQUEST_PROFILER_LOG_MAX_BYTES = int(os.getenv('REQUEST_PROFILER_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
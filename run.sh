@@ -21,6 +21,24 @@ fi
 
 echo ""
 echo "=== Migrations completed successfully ==="
+
+# SERVER_INTERFACE=asgi serves the ASGI application with uvicorn workers:
+# async views overlap their queries and the live attendance board streams
+# server-sent events instead of polling.
+if [ "$SERVER_INTERFACE" = "asgi" ]; then
+  echo "=== Starting Gunicorn (ASGI, uvicorn workers) ==="
+  exec gunicorn attendance_system.asgi:application --worker-class uvicorn.workers.UvicornWorker --workers 1 --bind 0.0.0.0:10000
+fi
+
+# GUNICORN_THREADS=N serves each worker's requests on N threads (gthread);
+# WEB_CONCURRENCY sets the worker processes (default 2). Pair it with
+# DB_POOL=True and DB_POOL_MAX_SIZE >= N so the threads share a pool rather
+# than each holding a connection.
+if [ -n "$GUNICORN_THREADS" ]; then
+  echo "=== Starting Gunicorn (threaded: ${WEB_CONCURRENCY:-2} workers x $GUNICORN_THREADS threads) ==="
+  exec gunicorn attendance_system.wsgi:application --worker-class gthread --workers "${WEB_CONCURRENCY:-2}" --threads "$GUNICORN_THREADS" --bind 0.0.0.0:10000
+fi
+
 echo "=== Starting Gunicorn ==="
 
 exec gunicorn attendance_system.wsgi:application --workers 1 --bind 0.0.0.0:10000
@@ -1,63 +1,122 @@
 // Instant mark present via AJAX
+// Clicks made in quick succession are queued and sent to the session's
+// batch endpoint as a single JSON request.
 document.addEventListener('DOMContentLoaded', function() {
-    const markPresentForms = document.querySelectorAll('.mark-present-form');
-    
-    markPresentForms.forEach(form => {
-        form.addEventListener('submit', function(e) {
-            e.preventDefault();
-            
-            const studentId = this.getAttribute('data-student-id');
-            const sessionId = this.getAttribute('data-session-id');
-            const csrfToken = this.querySelector('[name="csrfmiddlewaretoken"]').value;
-            
-            const formData = new FormData();
-            formData.append('status_' + studentId, 'present');
-            formData.append('remarks_' + studentId, '');
-            formData.append('csrfmiddlewaretoken', csrfToken);
-            
-            // Show loading state
-            const btn = this.querySelector('button[type="submit"]');
-            const originalText = btn.innerHTML;
-            btn.disabled = true;
-            btn.innerHTML = '<i class="bi bi-hourglass-split"></i> Saving...';
-            
-            fetch(form.getAttribute('action'), {
-                method: 'POST',
-                body: formData,
-                headers: {
-                    'X-Requested-With': 'XMLHttpRequest'
-                }
-            })
-            .then(response => {
-                if (response.ok) {
-                    // Show success feedback
-                    btn.classList.add('btn-success');
-                    btn.classList.remove('btn-primary');
-                    btn.innerHTML = '<i class="bi bi-check-circle"></i> Marked Present';
-                    
-                    // Optional: disable further clicks
-                    btn.disabled = true;
-                    
-                    // Flash green highlight
-                    const row = form.closest('tr');
-                    if (row) {
-                        row.style.backgroundColor = '#d4edda';
-                        setTimeout(() => {
-                            row.style.backgroundColor = '';
-                        }, 1500);
-                    }
-                } else {
-                    throw new Error('Failed to mark attendance');
-                }
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                btn.disabled = false;
-                btn.innerHTML = '<i class="bi bi-exclamation-circle"></i> Error';
-                setTimeout(() => {
-                    btn.innerHTML = originalText;
-                }, 2000);
-            });
+    const BATCH_DELAY_MS = 250;
+    const queues = {};
+
+    function showSuccess(form) {
+        const btn = form.querySelector('button[type="submit"]');
+        btn.classList.add('btn-success');
+        btn.classList.remove('btn-primary');
+        btn.innerHTML = '<i class="bi bi-check-circle"></i> Marked Present';
+
+        // Optional: disable further clicks
+        btn.disabled = true;
+
+        // Flash green highlight
+        const row = form.closest('tr');
+        if (row) {
+            row.style.backgroundColor = '#d4edda';
+            setTimeout(() => {
+                row.style.backgroundColor = '';
+            }, 1500);
+        }
+    }
+
+    function showError(form, originalText) {
+        const btn = form.querySelector('button[type="submit"]');
+        btn.disabled = false;
+        btn.innerHTML = '<i class="bi bi-exclamation-circle"></i> Error';
+        setTimeout(() => {
+            btn.innerHTML = originalText;
+        }, 2000);
+    }
+
+    function flush(batchUrl) {
+        const queue = queues[batchUrl];
+        delete queues[batchUrl];
+
+        fetch(batchUrl, {
+            method: 'POST',
+            body: JSON.stringify({
+                records: queue.items.map(item => ({
+                    student_id: item.studentId,
+                    status: 'present',
+                    remarks: '',
+                })),
+            }),
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': queue.csrfToken,
+                'X-Requested-With': 'XMLHttpRequest'
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Failed to mark attendance');
+            }
+            queue.items.forEach(item => showSuccess(item.form));
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            queue.items.forEach(item => showError(item.form, item.originalText));
         });
+    }
+
+    function postForm(form, studentId, csrfToken, originalText) {
+        const formData = new FormData();
+        formData.append('status_' + studentId, 'present');
+        formData.append('remarks_' + studentId, '');
+        formData.append('csrfmiddlewaretoken', csrfToken);
+
+        fetch(form.getAttribute('action'), {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            }
+        })
+        .then(response => {
+            if (response.ok) {
+                showSuccess(form);
+            } else {
+                throw new Error('Failed to mark attendance');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showError(form, originalText);
+        });
+    }
+
+    // Delegated, so rows the live board adds later work too
+    document.addEventListener('submit', function(e) {
+        const form = e.target.closest('.mark-present-form');
+        if (!form) {
+            return;
+        }
+        e.preventDefault();
+
+        const studentId = form.getAttribute('data-student-id');
+        const batchUrl = form.getAttribute('data-batch-url');
+        const csrfToken = form.querySelector('[name="csrfmiddlewaretoken"]').value;
+
+        // Show loading state
+        const btn = form.querySelector('button[type="submit"]');
+        const originalText = btn.innerHTML;
+        btn.disabled = true;
+        btn.innerHTML = '<i class="bi bi-hourglass-split"></i> Saving...';
+
+        if (!batchUrl) {
+            postForm(form, studentId, csrfToken, originalText);
+            return;
+        }
+
+        if (!queues[batchUrl]) {
+            queues[batchUrl] = {csrfToken: csrfToken, items: []};
+            setTimeout(() => flush(batchUrl), BATCH_DELAY_MS);
+        }
+        queues[batchUrl].items.push({form: form, studentId: studentId, originalText: originalText});
     });
 });